@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Análise de posições em lote, com saída em streaming.
+
+Lê uma posição por linha (arquivo ou stdin), avalia cada uma com o motor e o
+orçamento escolhidos em vários processos e escreve os resultados como linhas
+JSON, na mesma ordem da entrada. Só uma janela limitada de posições fica em
+memória, então o tamanho da entrada não importa.
+
+Formato de entrada: a notação compacta de `notation.py` ou o JSON de
+`GameCore.to_dict` (usado pelo servidor), por exemplo
+{"boards": ["X        ", ...], "current_player": "O"}. Linhas em branco são
+ignoradas.
+
+Uso:
+    python analyze.py posicoes.jsonl -o resultados.jsonl --engine hard --depth 3
+    cat posicoes.jsonl | python analyze.py - -o resultados.jsonl --workers 8
+    python analyze.py posicoes.jsonl -o resultados.jsonl --resume
+    python analyze.py posicoes.jsonl --depth 3 --cache busca.cache
+    python analyze.py posicoes.jsonl --depth 3 --value-net value_net.npz
+    python analyze.py posicoes.jsonl --engine medium --multi-pv 3
+
+Sem `--depth` a busca usa o orçamento de nós do motor (ver
+DIFFICULTY_LEVELS em cpu_player.py), então o resultado não depende da
+máquina. A jogada informada é sempre a melhor da busca, sem o sorteio que os
+níveis fácil e médio fazem no jogo.
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+
+from game_core import GameState, GameCore
+from cpu_player import CPUPlayer
+from search_cache import open_search_cache
+import notation
+
+ENGINES = ("easy", "medium", "hard")
+
+
+def parse_position(line):
+    """Converte uma linha de entrada em uma partida (ValueError se inválida)."""
+    if notation.is_notation(line):
+        return notation.parse_position(line)
+    return GameCore.from_dict(json.loads(line))
+
+
+def analyze_position(line, engine, depth, cache_path=None, value_net_path=None, multi_pv=None):
+    """Executado nos processos: avalia uma posição e retorna o resultado."""
+    try:
+        game = parse_position(line)
+    except ValueError as e:
+        return {'error': str(e)}
+    if game.game_state != GameState.PLAYING:
+        return {'error': f"partida encerrada ({game.game_state.value})"}
+
+    search_cache = open_search_cache(cache_path) if cache_path else None
+    evaluator = None
+    if value_net_path:
+        from value_net import load_evaluator  # NumPy só é exigido com --value-net
+        evaluator = load_evaluator(value_net_path)
+    cpu = CPUPlayer(engine, player=game.current_player, max_depth=depth, search_cache=search_cache,
+                    evaluator=evaluator, multi_pv=multi_pv)
+    candidates = cpu.top_moves(game)
+    result = {
+        'best_move': list(candidates[0][0]) if candidates else None,
+        'score': cpu.last_score,
+        'depth': cpu.last_depth,
+        'nodes': cpu.nodes,
+    }
+    if multi_pv is not None:
+        result['candidates'] = [[list(move), score] for move, score in candidates]
+    return result
+
+
+def iter_positions(stream):
+    """Gera as linhas não vazias da entrada, sem carregar o arquivo inteiro."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def count_completed(output_path):
+    """Conta os resultados já gravados e descarta uma última linha incompleta."""
+    if not os.path.exists(output_path):
+        return 0
+    completed = 0
+    valid_size = 0
+    with open(output_path, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            completed += 1
+            valid_size += len(raw)
+    with open(output_path, 'r+b') as f:
+        f.truncate(valid_size)
+    return completed
+
+
+def run_analysis(positions, output, engine, depth, workers, window, cache_path=None,
+                 value_net_path=None, multi_pv=None):
+    """Avalia as posições mantendo no máximo `window` tarefas em andamento.
+
+    Os resultados são gravados na ordem da entrada: a fila guarda os futuros
+    em ordem e só o primeiro é esperado, então a memória fica limitada à
+    janela mesmo quando uma posição demora mais que as seguintes.
+    """
+    pending = collections.deque()
+    written = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, line in positions:
+            pending.append((index, executor.submit(analyze_position, line, engine, depth, cache_path,
+                                                   value_net_path, multi_pv)))
+            if len(pending) >= window:
+                written += _write_result(output, *pending.popleft())
+        while pending:
+            written += _write_result(output, *pending.popleft())
+    return written
+
+
+def _write_result(output, index, future):
+    result = {'index': index}
+    result.update(future.result())
+    output.write(json.dumps(result) + "\n")
+    output.flush()
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise de posições em lote")
+    parser.add_argument("input", help="arquivo de posições (uma por linha) ou '-' para stdin")
+    parser.add_argument("-o", "--output", help="arquivo de saída JSONL (padrão: stdout)")
+    parser.add_argument("--engine", choices=ENGINES, default="hard")
+    parser.add_argument("--depth", type=int, default=None,
+                        help="profundidade fixa da busca (padrão: orçamento de nós do motor)")
+    parser.add_argument("--multi-pv", type=int, metavar="K",
+                        help="inclui as K melhores jogadas com pontuação exata ('candidates')")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--window", type=int, default=None,
+                        help="posições em andamento ao mesmo tempo (padrão: 4 por processo)")
+    parser.add_argument("--cache", metavar="ARQUIVO",
+                        help="cache em disco de buscas (ver search_cache.py), compartilhado pelos processos")
+    parser.add_argument("--value-net", metavar="ARQUIVO",
+                        help="avalia as folhas com a rede de valor (ver value_net.py)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continua uma execução interrompida a partir do arquivo de saída")
+    args = parser.parse_args()
+
+    if args.resume and not args.output:
+        parser.error("--resume exige --output")
+    # Verificado antes de iniciar os processos, onde o erro apareceria por posição
+    for option, value in (("--depth", args.depth), ("--multi-pv", args.multi_pv)):
+        if value is not None and value < 1:
+            parser.error(f"{option} deve ser pelo menos 1")
+    window = args.window or args.workers * 4
+
+    skip = count_completed(args.output) if args.resume else 0
+    input_stream = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    if args.output:
+        output = open(args.output, 'a' if args.resume else 'w', encoding='utf-8')
+    else:
+        output = sys.stdout
+
+    try:
+        positions = itertools.islice(enumerate(iter_positions(input_stream)), skip, None)
+        written = run_analysis(positions, output, args.engine, args.depth, args.workers, window,
+                               args.cache, args.value_net, args.multi_pv)
+    except KeyboardInterrupt:
+        print("\nInterrompido; use --resume para continuar.", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if skip:
+        print(f"{skip} posições já analisadas foram puladas.", file=sys.stderr)
+    print(f"{written} posições analisadas.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Avaliação heurística x rede de valor: avaliações por segundo e busca.
+
+Mede, em posições aleatórias (semente fixa):
+    - a avaliação por características (`_evaluate_position`), uma a uma;
+    - a rede (`ValueNetEvaluator`), codificação + avaliação, em lotes de
+      1, 32 e 256 posições;
+    - a CPU difícil na profundidade `--depth` com cada avaliador (nós, tempo
+      e concordância da jogada escolhida).
+
+Sem `--net` usa pesos aleatórios: o custo da rede não depende dos pesos.
+
+Uso:
+    python benchmarks/bench_evaluator.py --positions 2000 --net value_net.npz
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cpu_player import CPUPlayer  # noqa: E402
+from value_net import ValueNet, ValueNetEvaluator  # noqa: E402
+from bench_search import random_positions  # noqa: E402
+
+BATCH_SIZES = (1, 32, 256)
+
+
+def heuristic_rate(states, cpu):
+    started = time.perf_counter()
+    for state in states:
+        cpu._evaluate_position(state)
+    return len(states) / (time.perf_counter() - started)
+
+
+def network_rate(states, evaluator, batch_size):
+    started = time.perf_counter()
+    for start in range(0, len(states), batch_size):
+        encoded = [evaluator.encode(state["boards"], state["main_board"], state["current_player"])
+                   for state in states[start:start + batch_size]]
+        evaluator.evaluate_batch(encoded)
+    return len(states) / (time.perf_counter() - started)
+
+
+def run_search(positions, depth, evaluator):
+    nodes = 0
+    moves = []
+    started = time.perf_counter()
+    for game in positions:
+        cpu = CPUPlayer("hard", player=game.current_player, max_depth=depth, evaluator=evaluator)
+        cpu.threat_budget = 0
+        moves.append(cpu.get_best_move(game))
+        nodes += cpu.nodes
+    return moves, nodes, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=2000)
+    parser.add_argument("--search-positions", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--net", help="arquivo .npz da rede (padrão: pesos aleatórios)")
+    args = parser.parse_args()
+
+    net = ValueNet.load(args.net) if args.net else ValueNet.initial(args.seed)
+    evaluator = ValueNetEvaluator(net)
+    positions = random_positions(args.positions, args.seed)
+    cpu = CPUPlayer("hard")
+    states = [cpu._copy_game_state(game) for game in positions]
+
+    print(f"Posições: {len(states)}  Rede: {args.net or 'pesos aleatórios'}")
+    print(f"  {'avaliador':<22} {'avaliações/s':>13}")
+    print(f"  {'heurística':<22} {heuristic_rate(states, cpu):13.0f}")
+    for batch_size in BATCH_SIZES:
+        label = f"rede, lote {batch_size}"
+        print(f"  {label:<22} {network_rate(states, evaluator, batch_size):13.0f}")
+
+    search_positions = positions[:args.search_positions]
+    print(f"\nBusca na profundidade {args.depth} ({len(search_positions)} posições)")
+    heuristic_moves, nodes, elapsed = run_search(search_positions, args.depth, None)
+    print(f"  heurística: {nodes / len(search_positions):.0f} nós/posição, "
+          f"{elapsed / len(search_positions) * 1000:.1f} ms/posição")
+    network_moves, nodes, elapsed = run_search(search_positions, args.depth, evaluator)
+    print(f"  rede:       {nodes / len(search_positions):.0f} nós/posição, "
+          f"{elapsed / len(search_positions) * 1000:.1f} ms/posição")
+    same = sum(a == b for a, b in zip(heuristic_moves, network_moves))
+    print(f"  mesma jogada em {same} de {len(search_positions)}")
+
+
+if __name__ == "__main__":
+    main()
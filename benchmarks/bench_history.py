@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Memória por posição guardada: árvore de histórico x cópias de listas aninhadas.
+
+Joga partidas aleatórias (semente fixa) e guarda todas as posições de duas
+formas: no `GameHistory` (tuplas com compartilhamento estrutural) e como
+cópias completas no formato de `CPUPlayer._copy_game_state`.
+
+Uso:
+    python benchmarks/bench_history.py --games 200
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game_core import GameState, GameCore  # noqa: E402
+from cpu_player import CPUPlayer  # noqa: E402
+from game_history import GameHistory  # noqa: E402
+
+
+def random_games(count, seed):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        game = GameCore()
+        moves = []
+        while game.game_state == GameState.PLAYING:
+            move = rng.choice(game.get_valid_moves())
+            game.make_move(*move)
+            moves.append(move)
+        games.append(moves)
+    return games
+
+
+def measure(store, games):
+    """Bytes alocados por `store` para guardar todas as posições."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept, positions = store(games)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before, positions
+
+
+def store_history(games):
+    histories = []
+    positions = 0
+    for moves in games:
+        history = GameHistory()
+        for move in moves:
+            history.play(move)
+            positions += 1
+        histories.append(history)
+    return histories, positions
+
+
+def store_copies(games):
+    cpu = CPUPlayer("hard")
+    copies = []
+    positions = 0
+    for moves in games:
+        game = GameCore()
+        for move in moves:
+            game.make_move(*move)
+            copies.append(cpu._copy_game_state(game))
+            positions += 1
+    return copies, positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    games = random_games(args.games, args.seed)
+    history_bytes, positions = measure(store_history, games)
+    copy_bytes, _ = measure(store_copies, games)
+    print(f"Posições guardadas: {positions}")
+    print(f"Histórico (tuplas compartilhadas): {history_bytes / positions:8.0f} bytes/posição")
+    print(f"Cópias de listas aninhadas:        {copy_bytes / positions:8.0f} bytes/posição")
+    print(f"Proporção: {history_bytes / copy_bytes:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Partidas entre níveis de dificuldade: força, nós e tempo por jogada.
+
+Cada confronto joga `--games` partidas alternando quem começa, depois de
+duas jogadas aleatórias de abertura (semente fixa). Além dos níveis de
+DIFFICULTY_LEVELS há duas referências: "random" (jogada uniforme, o antigo
+nível fácil) e "depth2" (busca completa em profundidade 2, o antigo nível
+difícil). Os níveis são determinísticos: o mesmo confronto com a mesma
+semente repete as mesmas partidas.
+
+Uso:
+    python benchmarks/bench_levels.py --games 20
+    python benchmarks/bench_levels.py --games 10 --matches easy:random medium:easy hard:depth2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game_core import Player, GameState, GameCore  # noqa: E402
+from cpu_player import CPUPlayer  # noqa: E402
+
+DEFAULT_MATCHES = ("easy:random", "medium:easy", "hard:medium", "hard:depth2")
+OPENING_PLIES = 2
+
+
+class RandomPlayer:
+    """Jogada uniforme entre as válidas, com semente."""
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.nodes = 0
+
+    def get_best_move(self, game):
+        return self.rng.choice(game.get_valid_moves())
+
+
+def make_player(name, player, seed):
+    if name == "random":
+        return RandomPlayer(seed)
+    if name == "depth2":
+        return CPUPlayer("hard", player=player, max_depth=2)
+    return CPUPlayer(name, player=player, seed=seed)
+
+
+def play_game(names, seed):
+    """Joga uma partida; `names` = (nome de X, nome de O).
+
+    Retorna (estado final, jogadas, {lado: [nós, segundos, jogadas]}).
+    """
+    rng = random.Random(seed)
+    game = GameCore()
+    for _ in range(OPENING_PLIES):
+        game.make_move(*rng.choice(game.get_valid_moves()))
+    players = {Player.X: make_player(names[0], Player.X, seed),
+               Player.O: make_player(names[1], Player.O, seed)}
+    usage = {Player.X: [0, 0.0, 0], Player.O: [0, 0.0, 0]}
+    moves = []
+    while game.game_state == GameState.PLAYING:
+        side = game.current_player
+        started = time.perf_counter()
+        move = players[side].get_best_move(game)
+        usage[side][1] += time.perf_counter() - started
+        usage[side][0] += players[side].nodes
+        usage[side][2] += 1
+        game.make_move(*move)
+        moves.append(move)
+    return game.game_state, moves, usage
+
+
+def run_match(first, second, games, seed):
+    points = 0.0
+    usage = {first: [0, 0.0, 0], second: [0, 0.0, 0]}
+    transcript = []
+    for index in range(games):
+        names = (first, second) if index % 2 == 0 else (second, first)
+        state, moves, game_usage = play_game(names, seed + index)
+        transcript.append(moves)
+        if state == GameState.TIE:
+            points += 0.5
+        elif (state == GameState.X_WINS) == (names[0] == first):
+            points += 1
+        for side, name in ((Player.X, names[0]), (Player.O, names[1])):
+            for i in range(3):
+                usage[name][i] += game_usage[side][i]
+    return points, usage, transcript
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--matches", nargs="+", default=DEFAULT_MATCHES,
+                        help="confrontos no formato nivel:nivel")
+    parser.add_argument("--check-repeat", action="store_true",
+                        help="repete o primeiro confronto e confere que as partidas são iguais")
+    args = parser.parse_args()
+
+    print(f"{'confronto':<16}{'pontos':>10}{'%':>7}   {'nós/jogada':>22}   {'ms/jogada':>18}")
+    for match in args.matches:
+        first, second = match.split(":")
+        points, usage, transcript = run_match(first, second, args.games, args.seed)
+        nodes = "/".join(f"{usage[name][0] / max(usage[name][2], 1):.0f}" for name in (first, second))
+        ms = "/".join(f"{usage[name][1] / max(usage[name][2], 1) * 1000:.1f}" for name in (first, second))
+        print(f"{match:<16}{points:>6.1f}/{args.games:<3}{points / args.games:>7.0%}   {nodes:>22}   {ms:>18}")
+        if args.check_repeat:
+            repeated = run_match(first, second, args.games, args.seed)[2]
+            print(f"  repetição {'idêntica' if repeated == transcript else 'DIFERENTE'}")
+            args.check_repeat = False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Custo de renderização por quadro, sem janela (SDL_VIDEODRIVER=dummy).
+
+Abre o jogo fora da tela cheia com o driver de vídeo "dummy" do SDL (não
+precisa de monitor), carrega posições roteirizadas e mede cada método
+`draw_*` chamado por `run()` e o quadro inteiro (incluindo `display.flip`).
+
+Não toca nos arquivos do usuário: o cache de buscas fica desativado e as
+estatísticas vão para um diretório temporário.
+
+Cenários:
+    empty     posição inicial
+    midgame   30 jogadas aleatórias (semente fixa)
+    decided   fim de partida com todos os tabuleiros decididos
+    hover     meio de jogo com o mouse sobre uma célula livre
+
+Uso:
+    python benchmarks/bench_render.py --frames 300
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame  # noqa: E402
+
+from game_core import Player, GameState, GameCore  # noqa: E402
+import ultimate_tic_tac_toe  # noqa: E402
+
+# Mesma ordem do loop principal em `UltimateTicTacToe.run`
+DRAW_STEPS = (
+    "draw_background",
+    "draw_hover_effect",
+    "draw_analysis",
+    "draw_grid",
+    "draw_moves",
+    "draw_main_winners",
+    "draw_status",
+    "draw_buttons",
+    "draw_sidebar_info",
+)
+
+
+def random_position(plies, seed):
+    """Partida com `plies` jogadas aleatórias (menos se acabar antes)."""
+    rng = random.Random(seed)
+    game = GameCore()
+    for _ in range(plies):
+        if game.game_state != GameState.PLAYING:
+            break
+        game.make_move(*rng.choice(game.get_valid_moves()))
+    return game
+
+
+def decided_position(seed):
+    """Primeira partida aleatória que termina com os 9 tabuleiros decididos."""
+    while True:
+        game = random_position(81, seed)
+        if all(cell != Player.EMPTY for row in game.main_board for cell in row):
+            return game
+        seed += 1
+
+
+def scenarios(seed):
+    midgame = random_position(30, seed)
+    main_row, main_col, row, col = midgame.get_valid_moves()[0]
+    return [
+        ("empty", GameCore(), None),
+        ("midgame", midgame, None),
+        ("decided", decided_position(seed), None),
+        ("hover", midgame, ((main_row, main_col), (row, col))),
+    ]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(game, frames, warmup):
+    """Tempos em ms por passo de desenho e por quadro."""
+    steps = [(name, getattr(game, name)) for name in DRAW_STEPS]
+    timings = {name: [] for name in DRAW_STEPS + ("display.flip", "frame")}
+    for frame in range(warmup + frames):
+        pygame.event.pump()
+        frame_start = time.perf_counter()
+        for name, draw in steps:
+            start = time.perf_counter()
+            draw()
+            if frame >= warmup:
+                timings[name].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        pygame.display.flip()
+        end = time.perf_counter()
+        if frame >= warmup:
+            timings["display.flip"].append((end - start) * 1000)
+            timings["frame"].append((end - frame_start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stats_dir = tempfile.TemporaryDirectory()
+    ultimate_tic_tac_toe.SEARCH_CACHE_FILE = None
+    ultimate_tic_tac_toe.STATS_FILE = os.path.join(stats_dir.name, "stats.json")
+    game = ultimate_tic_tac_toe.UltimateTicTacToe(fullscreen=False)
+    print(f"Driver de vídeo: {pygame.display.get_driver()}  "
+          f"Tela: {game.screen.get_width()}x{game.screen.get_height()}  Quadros: {args.frames}")
+    try:
+        for label, position, hover in scenarios(args.seed):
+            # set_position não passa por make_move: nada é gravado nas estatísticas
+            game.set_position(position)
+            game.hover_cell = hover
+            timings = measure(game, args.frames, args.warmup)
+
+            print(f"\n{label}")
+            print(f"  {'passo':<20} {'média ms':>9} {'p95 ms':>9}")
+            for name, samples in timings.items():
+                mean = sum(samples) / len(samples)
+                print(f"  {name:<20} {mean:9.3f} {percentile(samples, 0.95):9.3f}")
+    finally:
+        pygame.quit()
+        stats_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
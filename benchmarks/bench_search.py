@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Benchmark da busca da CPU difícil: negamax PVS x minimax original.
+
+Gera posições aleatórias (semente fixa), roda as duas buscas na mesma
+profundidade, confere que escolhem a mesma jogada e compara nós e tempo.
+
+Uso:
+    python benchmarks/bench_search.py --positions 30 --depth 2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game_core import Player, GameState, GameCore  # noqa: E402
+from cpu_player import CPUPlayer  # noqa: E402
+
+
+class LegacyCPUPlayer(CPUPlayer):
+    """Minimax original (max/min separados, cópia do estado por nó), como referência."""
+    def _get_minimax_move(self, game):
+        """Raiz original: cada filho com janela (-inf, +inf) nova."""
+        valid_moves = self._get_valid_moves(game)
+        if not valid_moves:
+            return None
+
+        best_move = None
+        best_score = float("-inf")
+
+        # Cria uma cópia do estado do jogo para o minimax
+        initial_game_state_copy = self._copy_game_state(game)
+
+        for move in valid_moves:
+            # Simula a jogada na cópia
+            game_copy_for_move = self._copy_game_state_from_dict(initial_game_state_copy)
+            main_row, main_col, row, col = move
+            self._make_move_on_copy(game_copy_for_move, main_row, main_col, row, col, self.player)
+
+            # Avalia usando minimax
+            score = self._minimax(game_copy_for_move, self.max_depth - 1, False, float("-inf"), float("inf"))
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+        self.last_score = best_score
+        self.last_depth = self.max_depth
+        return best_move
+
+    def _minimax(self, game_state_dict, depth, is_maximizing, alpha, beta):
+        """Algoritmo minimax com poda alfa-beta."""
+        self.nodes += 1
+        # Verifica condições de parada
+        winner = self._check_game_winner(game_state_dict)
+        if winner == self.player:
+            return 100 + depth  # Prefere vitórias mais rápidas
+        elif winner == (Player.X if self.player == Player.O else Player.O):
+            return -100 - depth  # Evita derrotas mais rápidas
+        elif winner == Player.TIE or depth == 0:
+            return self._evaluate_position(game_state_dict)
+
+        valid_moves = self._get_valid_moves_from_state(game_state_dict)
+        if not valid_moves:
+            return self._evaluate_position(game_state_dict)
+
+        if is_maximizing:
+            max_eval = float("-inf")
+            for move in valid_moves:
+                game_copy = self._copy_game_state_from_dict(game_state_dict)
+                main_row, main_col, row, col = move
+                self._make_move_on_copy(game_copy, main_row, main_col, row, col, self.player)
+
+                eval_score = self._minimax(game_copy, depth - 1, False, alpha, beta)
+                max_eval = max(max_eval, eval_score)
+                alpha = max(alpha, eval_score)
+
+                if beta <= alpha:
+                    break  # Poda alfa-beta
+            return max_eval
+        else:
+            min_eval = float("inf")
+            opponent = Player.X if self.player == Player.O else Player.O
+            for move in valid_moves:
+                game_copy = self._copy_game_state_from_dict(game_state_dict)
+                main_row, main_col, row, col = move
+                self._make_move_on_copy(game_copy, main_row, main_col, row, col, opponent)
+
+                eval_score = self._minimax(game_copy, depth - 1, True, alpha, beta)
+                min_eval = min(min_eval, eval_score)
+                beta = min(beta, eval_score)
+
+                if beta <= alpha:
+                    break  # Poda alfa-beta
+            return min_eval
+
+    def _copy_game_state_from_dict(self, game_state_dict):
+        """Cria uma cópia do estado do jogo a partir de um dicionário de estado."""
+        return {
+            'boards': [[[cell for cell in row] for row in board] for board in game_state_dict['boards']],
+            'main_board': [[cell for cell in row] for row in game_state_dict['main_board']],
+            'current_player': game_state_dict['current_player'],
+            'game_state': game_state_dict['game_state']
+        }
+
+    def _make_move_on_copy(self, game_state_dict, main_row, main_col, row, col, player):
+        """Faz uma jogada na cópia do estado do jogo."""
+        board_index = main_row * 3 + main_col
+        game_state_dict['boards'][board_index][row][col] = player
+
+        # Verifica vitória no tabuleiro pequeno
+        winner = self._check_winner_board(game_state_dict['boards'][board_index])
+        if winner:
+            game_state_dict['main_board'][main_row][main_col] = winner
+        elif self._is_board_full_state(game_state_dict['boards'][board_index]):
+            game_state_dict['main_board'][main_row][main_col] = Player.TIE
+
+        # Atualiza jogador atual
+        game_state_dict['current_player'] = Player.O if player == Player.X else Player.X
+
+
+
+def random_positions(count, seed, max_plies=40):
+    """Posições alcançáveis por jogadas aleatórias, ainda em andamento."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = GameCore()
+        for _ in range(rng.randint(0, max_plies)):
+            if game.game_state != GameState.PLAYING:
+                break
+            game.make_move(*rng.choice(game.get_valid_moves()))
+        if game.game_state == GameState.PLAYING:
+            positions.append(game)
+    return positions
+
+
+def run_engine(engine_class, positions, depth):
+    moves, nodes = [], 0
+    started = time.perf_counter()
+    for game in positions:
+        cpu = engine_class("hard", player=game.current_player, max_depth=depth)
+        cpu.threat_budget = 0  # Compara só a busca completa
+        moves.append(cpu.get_best_move(game))
+        nodes += cpu.nodes
+    return moves, nodes, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=30)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    positions = random_positions(args.positions, args.seed)
+    legacy_moves, legacy_nodes, legacy_time = run_engine(LegacyCPUPlayer, positions, args.depth)
+    new_moves, new_nodes, new_time = run_engine(CPUPlayer, positions, args.depth)
+
+    mismatches = sum(a != b for a, b in zip(legacy_moves, new_moves))
+    print(f"Posições: {len(positions)}  Profundidade: {args.depth}")
+    print(f"{'busca':<10}{'nós':>12}{'tempo (s)':>12}{'nós/s':>12}")
+    for name, nodes, elapsed in (("minimax", legacy_nodes, legacy_time),
+                                 ("negamax", new_nodes, new_time)):
+        print(f"{name:<10}{nodes:>12}{elapsed:>12.2f}{nodes / elapsed:>12.0f}")
+    print(f"Nós: {new_nodes / legacy_nodes:.1%} do original  "
+          f"Tempo: {new_time / legacy_time:.1%} do original")
+    print(f"Jogadas diferentes: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
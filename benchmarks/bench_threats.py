@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Busca de ameaças no tabuleiro principal x busca completa.
+
+Para posições aleatórias (semente fixa), roda a busca de ameaças da CPU
+difícil e, em cada vitória forçada encontrada, a busca negamax completa na
+profundidade da vitória (até `--max-depth`), conferindo se ela também vê a
+vitória e comparando nós e tempo.
+
+Uso:
+    python benchmarks/bench_threats.py --positions 300 --max-depth 3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cpu_player import CPUPlayer  # noqa: E402
+from bench_search import random_positions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-plies", type=int, default=60, help="jogadas aleatórias por posição")
+    parser.add_argument("--max-depth", type=int, default=3,
+                        help="maior profundidade da busca completa usada para comparar")
+    args = parser.parse_args()
+
+    positions = random_positions(args.positions, args.seed, args.max_plies)
+    found = {}
+    threat_nodes = threat_time = 0.0
+    full_nodes = full_time = 0.0
+    compared = confirmed = 0
+    for game in positions:
+        cpu = CPUPlayer("hard", player=game.current_player)
+        started = time.perf_counter()
+        forced = cpu._threat_space_search(cpu._copy_game_state(game))
+        elapsed = time.perf_counter() - started
+        threat_nodes += cpu.threat_nodes
+        threat_time += elapsed
+        if forced is None:
+            continue
+        move, plies = forced
+        found[plies] = found.get(plies, 0) + 1
+        if plies == 1 or plies > args.max_depth:
+            continue
+
+        full = CPUPlayer("hard", player=game.current_player, max_depth=plies)
+        full.threat_budget = 0
+        started = time.perf_counter()
+        full.get_best_move(game)
+        full_time += time.perf_counter() - started
+        full_nodes += full.nodes
+        compared += 1
+        confirmed += full.last_score >= 100
+
+    print(f"Posições: {len(positions)}  Vitórias forçadas (meias-jogadas: quantidade): "
+          f"{dict(sorted(found.items()))}")
+    print(f"Busca de ameaças: {threat_nodes / len(positions):.0f} nós/posição, "
+          f"{threat_time / len(positions) * 1000:.2f} ms/posição")
+    if compared:
+        print(f"Busca completa nas {compared} vitórias de 3 a {args.max_depth} meias-jogadas: "
+              f"{full_nodes / compared:.0f} nós/posição, {full_time / compared * 1000:.1f} ms/posição, "
+              f"vitória confirmada em {confirmed}")
+
+
+if __name__ == "__main__":
+    main()
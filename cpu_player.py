@@ -0,0 +1,1050 @@
+# -*- coding: utf-8 -*-
+"""Lógica da CPU (sem dependência do pygame)."""
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+from dataclasses import dataclass
+
+from game_core import Player, GameState, GameCore
+import notation
+from search_cache import open_search_cache
+
+
+# Meia-largura da janela de aspiração em torno da pontuação da iteração anterior
+ASPIRATION_WINDOW = 5.0
+# Largura da janela nula da PVS (as pontuações não são inteiras)
+NULL_WINDOW = 1e-6
+
+# Orçamento de nós da busca de ameaças no tabuleiro principal, feita antes da
+# busca normal da CPU difícil (0 desativa)
+THREAT_SEARCH_NODES = 5000
+# Máximo de jogadas de ameaça do atacante antes da jogada vencedora
+THREAT_SEARCH_DEPTH = 6
+
+
+@dataclass(frozen=True)
+class DifficultyLevel:
+    """Nível de dificuldade: orçamento de nós da busca e escolha entre as melhores jogadas.
+
+    A força depende só de nós contados, não do relógio, e a escolha é
+    sorteada com semente: a mesma posição e semente dão a mesma jogada em
+    qualquer máquina.
+    """
+    node_budget: int    # Nós da busca (aprofundamento iterativo até esgotar)
+    multi_pv: int       # Jogadas da raiz com pontuação exata
+    temperature: float  # Escala do softmax entre elas, em pontos (0 = sempre a melhor)
+    threat_budget: int  # Nós da busca de ameaças (0 desativa)
+
+
+# Calibrados com benchmarks/bench_levels.py: cada nível vence o anterior na
+# maioria das partidas, e o difícil empata com a antiga busca fixa em
+# profundidade 2
+DIFFICULTY_LEVELS = {
+    "easy": DifficultyLevel(node_budget=100, multi_pv=12, temperature=60.0, threat_budget=0),
+    "medium": DifficultyLevel(node_budget=300, multi_pv=4, temperature=15.0, threat_budget=500),
+    "hard": DifficultyLevel(node_budget=3000, multi_pv=1, temperature=0.0,
+                            threat_budget=THREAT_SEARCH_NODES),
+}
+
+# Pesos ajustados da avaliação (gerados por tuning.py); sem o arquivo, a CPU
+# usa a avaliação original
+EVAL_WEIGHTS_FILE = "eval_weights.json"
+
+# Características da avaliação: para cada grupo, linhas com 3, 2 (+1 vazia) e
+# 1 (+2 vazias) peças, contadas como X menos O. Os pesos padrão reproduzem
+# `_evaluate_position`: 50/10/1 por linha, x10 no tabuleiro principal, +50%
+# no tabuleiro central e +30% nos cantos.
+FEATURE_GROUPS = ("main", "center", "corner", "edge")
+BOARD_GROUPS = ("corner", "edge", "corner", "edge", "center", "edge", "corner", "edge", "corner")
+DEFAULT_EVAL_WEIGHTS = {
+    "main": [500.0, 100.0, 10.0],
+    "center": [75.0, 15.0, 1.5],
+    "corner": [65.0, 13.0, 1.3],
+    "edge": [50.0, 10.0, 1.0],
+}
+_LINE_CELLS = (
+    ((0, 0), (0, 1), (0, 2)), ((1, 0), (1, 1), (1, 2)), ((2, 0), (2, 1), (2, 2)),
+    ((0, 0), (1, 0), (2, 0)), ((0, 1), (1, 1), (2, 1)), ((0, 2), (1, 2), (2, 2)),
+    ((0, 0), (1, 1), (2, 2)), ((0, 2), (1, 1), (2, 0)),
+)
+
+
+def extract_features(boards, main_board):
+    """Características da avaliação de uma posição, do ponto de vista de X.
+
+    Retorna 12 inteiros na ordem de FEATURE_GROUPS x (3, 2, 1 peças). É a
+    referência que `tuning.extract_features_batch` reproduz exatamente.
+    """
+    features = [0] * 12
+    for group_offset, board in [(0, main_board)] + [
+            (FEATURE_GROUPS.index(BOARD_GROUPS[i]) * 3, board) for i, board in enumerate(boards)]:
+        for line in _LINE_CELLS:
+            cells = [board[row][col] for row, col in line]
+            x_count = cells.count(Player.X)
+            o_count = cells.count(Player.O)
+            empty_count = cells.count(Player.EMPTY)
+            for count, sign in ((x_count, 1), (o_count, -1)):
+                if count == 3:
+                    features[group_offset] += sign
+                elif count == 2 and empty_count == 1:
+                    features[group_offset + 1] += sign
+                elif count == 1 and empty_count == 2:
+                    features[group_offset + 2] += sign
+    return features
+
+
+def weights_to_vector(weights):
+    """Converte o dicionário de pesos {grupo: [w3, w2, w1]} na ordem das características."""
+    return [float(value) for group in FEATURE_GROUPS for value in weights[group]]
+
+
+def load_eval_weights(path=EVAL_WEIGHTS_FILE):
+    """Carrega os pesos ajustados; retorna None se o arquivo não existir ou for inválido."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            vector = weights_to_vector(json.load(f)["weights"])
+        if len(vector) != 12:
+            raise ValueError("esperados 12 pesos")
+        return vector
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Aviso: Não foi possível carregar os pesos da avaliação. Usando os padrões. Erro: {e}")
+        return None
+
+
+_startup_eval_weights = None
+_startup_eval_weights_loaded = False
+
+
+def default_eval_weights():
+    """Pesos lidos de EVAL_WEIGHTS_FILE uma única vez por processo (ou None)."""
+    global _startup_eval_weights, _startup_eval_weights_loaded
+    if not _startup_eval_weights_loaded:
+        _startup_eval_weights = load_eval_weights()
+        _startup_eval_weights_loaded = True
+    return _startup_eval_weights
+
+
+class LeafEvaluator:
+    """Interface de avaliadores de folhas plugáveis no CPUPlayer.
+
+    A busca chama `encode` para cada folha enquanto a posição está montada
+    e depois `evaluate_batch` com todas as folhas de um nó de profundidade
+    1, para que o avaliador processe muitas posições de uma vez. As
+    pontuações são do ponto de vista de X e devem ficar em (-100, 100),
+    abaixo das pontuações de vitória.
+    """
+    def encode(self, boards, main_board, side_to_move):
+        """Representação compacta de uma posição (copiada; o estado vai mudar)."""
+        raise NotImplementedError
+
+    def evaluate_batch(self, encoded):
+        """Pontuações (ponto de vista de X) para uma lista de posições codificadas."""
+        raise NotImplementedError
+
+    def cache_tag(self):
+        """Identifica o avaliador nas chaves do cache de busca."""
+        return type(self).__name__
+
+
+class HeuristicEvaluator(LeafEvaluator):
+    """A avaliação por características de `extract_features` como LeafEvaluator."""
+    def __init__(self, weights=None):
+        self.weights = weights or weights_to_vector(DEFAULT_EVAL_WEIGHTS)
+
+    def encode(self, boards, main_board, side_to_move):
+        return extract_features(boards, main_board)
+
+    def evaluate_batch(self, encoded):
+        return [sum(w * f for w, f in zip(self.weights, features)) for features in encoded]
+
+    def cache_tag(self):
+        return "heuristic:" + ",".join(f"{weight:.6g}" for weight in self.weights)
+
+
+class SearchAborted(Exception):
+    """A busca foi cancelada antes de terminar (ex.: fim do pondering)."""
+
+
+class _NodeBudgetExhausted(Exception):
+    """O orçamento de nós acabou no meio de uma iteração do aprofundamento."""
+
+
+class _ThreatBudgetExhausted(Exception):
+    """A busca de ameaças passou do orçamento de nós."""
+
+
+class CPUPlayer:
+    """Classe para lógica da CPU com diferentes níveis de dificuldade."""
+    def __init__(self, difficulty="medium", player=Player.O, max_depth=None, eval_weights=None,
+                 search_cache=None, evaluator=None, multi_pv=None, seed=0):
+        self.difficulty = difficulty
+        self.player = player  # Na interface a CPU sempre joga como O
+        level = DIFFICULTY_LEVELS[difficulty]
+
+        # Sem `max_depth` a busca aprofunda até gastar o orçamento de nós do
+        # nível; com ele, busca exatamente até essa profundidade
+        self.max_depth = max_depth
+        self.node_budget = level.node_budget if max_depth is None else None
+        self._node_limit = float("inf")
+
+        # Multi-PV: as `multi_pv` melhores jogadas recebem pontuação exata e
+        # a jogada é sorteada entre elas (softmax com `temperature`), com
+        # semente derivada de `seed` e da posição
+        self.multi_pv = multi_pv if multi_pv is not None else level.multi_pv
+        self.temperature = level.temperature
+        self.seed = seed
+
+        # Pesos ajustados da avaliação (vetor de 12, ver FEATURE_GROUPS);
+        # None mantém a avaliação original
+        self.eval_weights = eval_weights if eval_weights is not None else default_eval_weights()
+
+        # Avaliador de folhas opcional (LeafEvaluator, ex.: value_net.ValueNetEvaluator);
+        # com ele as folhas são avaliadas em lote
+        self.evaluator = evaluator
+
+        # Cache em disco opcional (search_cache.SearchCache) consultado antes da busca
+        self.search_cache = search_cache
+
+        # Busca de ameaças antes da busca normal (ver _threat_space_search)
+        self.threat_budget = level.threat_budget
+        self.threat_nodes = 0
+
+        # Informações da última busca (usadas pela análise em lote)
+        self.nodes = 0
+        self.last_score = None
+        self.last_depth = 0
+        self.last_candidates = []  # [(jogada, pontuação)], da melhor para a pior
+
+        # Função opcional consultada durante a busca; se retornar True a
+        # busca é interrompida com SearchAborted
+        self.abort_check = None
+
+    def get_best_move(self, game):
+        """Retorna a jogada da CPU (a melhor, ou sorteada entre as melhores)."""
+        self.nodes = 0
+        self.threat_nodes = 0
+        self.last_score = None
+        self.last_depth = 0
+        self.last_candidates = []
+        return self._get_minimax_move(game)
+
+    def top_moves(self, game):
+        """As `multi_pv` melhores jogadas com pontuação, de uma só busca, sem sortear."""
+        self.nodes = 0
+        self.threat_nodes = 0
+        self.last_score = None
+        self.last_depth = 0
+        return self._search_candidates(game)
+
+    def _choose_move(self, game, candidates):
+        """Sorteia entre as candidatas com probabilidade exp((pontuação - melhor) / temperatura).
+
+        A semente junta `seed` e a posição, então a escolha não depende de
+        quantas jogadas o mesmo CPUPlayer já fez (ex.: processos do servidor).
+        """
+        if len(candidates) == 1 or self.temperature <= 0:
+            return candidates[0][0]
+        best = candidates[0][1]
+        weights = [math.exp((score - best) / self.temperature) for _, score in candidates]
+        rng = random.Random(f"{self.seed}/{notation.format_position(game)}")
+        return rng.choices([move for move, _ in candidates], weights)[0]
+
+    def rank_likely_moves(self, game):
+        """Ordena as jogadas do lado a jogar das mais prováveis às menos prováveis.
+
+        Usa as mesmas prioridades da estratégia média: vencer o jogo, bloquear
+        o jogo, vencer um tabuleiro, bloquear um tabuleiro, centro e o resto.
+        """
+        def priority(move):
+            if self._can_win_main_board(game, *move):
+                return 0
+            if self._can_block_main_board(game, *move):
+                return 1
+            if self._can_win_small_board(game, *move):
+                return 2
+            if self._can_block_small_board(game, *move):
+                return 3
+            if move[2] == 1 and move[3] == 1:
+                return 4
+            return 5
+        return sorted(self._get_valid_moves(game), key=priority)
+
+    def _get_minimax_move(self, game):
+        """Jogada escolhida entre as candidatas de `_search_candidates`."""
+        candidates = self._search_candidates(game)
+        if not candidates:
+            return None
+        return self._choose_move(game, candidates)
+
+    def _search_candidates(self, game):
+        """Negamax com PVS e aprofundamento iterativo; retorna [(jogada, pontuação)].
+
+        Com `multi_pv` = 1, cada iteração abre uma janela de aspiração em
+        torno da pontuação da anterior e refaz a busca com janela completa
+        se o resultado cair fora dela. As jogadas da raiz seguem a ordem de
+        `_get_valid_moves` e só trocam de melhor com pontuação estritamente
+        maior, então a jogada é a mesma do minimax completo na mesma
+        profundidade. Com mais, ver `_search_root_multi_pv`.
+
+        O aprofundamento vai até `max_depth` ou, sem ele, até o orçamento de
+        nós acabar: a iteração interrompida é descartada e valem as
+        candidatas da última completa (a profundidade 1 sempre completa).
+        """
+        valid_moves = self._get_valid_moves(game)
+        if not valid_moves:
+            self.last_candidates = []
+            return []
+
+        # O cache guarda só a melhor jogada: vale apenas sem multi-PV
+        cache_key = None
+        if self.search_cache is not None and self.multi_pv == 1:
+            cache_key = self._cache_key(game)
+            cached = self.search_cache.get(cache_key)
+            # A conferência da jogada protege contra colisões do hash
+            if cached is not None and cached[2] in valid_moves:
+                self.last_depth, self.last_score, move = cached
+                self.last_candidates = [(move, self.last_score)]
+                return self.last_candidates
+
+        # Estado único, alterado e restaurado a cada jogada (sem cópias por nó)
+        state = self._copy_game_state(game)
+
+        # Pré-busca: vitória forçada por ameaças no tabuleiro principal
+        if self.threat_budget > 0:
+            forced = self._threat_space_search(state)
+            if forced is not None:
+                move, plies = forced
+                self.last_score = 100.0
+                self.last_depth = plies
+                self.last_candidates = [(move, self.last_score)]
+                if cache_key is not None:
+                    self.search_cache.put(cache_key, plies, self.last_score, move)
+                return self.last_candidates
+
+        # Além das casas vazias não há o que aprofundar
+        empty_cells = sum(row.count(Player.EMPTY) for board in state['boards'] for row in board)
+        max_depth = self.max_depth if self.max_depth is not None else empty_cells
+        self._killers = [[None, None] for _ in range(max_depth + 1)]
+
+        candidates = None
+        try:
+            for depth in range(1, max_depth + 1):
+                if depth == 2 and self.node_budget is not None:
+                    self._node_limit = self.node_budget
+                try:
+                    if self.multi_pv == 1:
+                        candidates = [self._search_root_aspiration(state, valid_moves, depth, candidates)]
+                    else:
+                        # Ordem da raiz: pontuações da iteração anterior (estável nos empates)
+                        if candidates is not None:
+                            order = {move: index for index, (move, _) in enumerate(candidates)}
+                            valid_moves = sorted(valid_moves, key=lambda move: order.get(move, len(order)))
+                        candidates = self._search_root_multi_pv(state, valid_moves, depth, self.multi_pv)
+                except _NodeBudgetExhausted:
+                    break
+                self.last_depth = depth
+        finally:
+            self._node_limit = float("inf")
+
+        self.last_score = candidates[0][1]
+        self.last_candidates = candidates
+        if cache_key is not None:
+            self.search_cache.put(cache_key, self.last_depth, self.last_score, candidates[0][0])
+        return candidates
+
+    def _search_root_aspiration(self, state, moves, depth, previous):
+        """Uma iteração com janela de aspiração em torno de `previous`; retorna (jogada, pontuação)."""
+        if previous is None:
+            alpha, beta = float("-inf"), float("inf")
+        else:
+            score = previous[0][1]
+            alpha, beta = score - ASPIRATION_WINDOW, score + ASPIRATION_WINDOW
+        move, score = self._search_root(state, moves, depth, alpha, beta)
+        if move is None or score <= alpha or score >= beta:
+            # Falhou fora da janela: repete com janela completa
+            move, score = self._search_root(state, moves, depth, float("-inf"), float("inf"))
+        return move, score
+
+    def _cache_key(self, game):
+        """Texto que identifica a busca: posição, lado da CPU, profundidade (ou nós) e avaliação."""
+        if self.evaluator is not None:
+            evaluation = self.evaluator.cache_tag()
+        elif self.eval_weights is None:
+            evaluation = "default"
+        else:
+            evaluation = ",".join(f"{weight:.6g}" for weight in self.eval_weights)
+        limit = self.max_depth if self.max_depth is not None else f"n{self.node_budget}"
+        return (f"{notation.format_position(game)} {self.player.value} {limit} "
+                f"{evaluation} {self.threat_budget}")
+
+    # --- Busca de ameaças (tabuleiro principal) ---
+    def _threat_space_search(self, state):
+        """Procura uma vitória forçada só com jogadas de ameaça no tabuleiro principal.
+
+        Busca E-OU com aprofundamento iterativo: o atacante (a CPU) só
+        considera jogadas depois das quais ele ameaça vencer o jogo na jogada
+        seguinte; o defensor considera todas as jogadas que podem anular as
+        ameaças (qualquer célula dos tabuleiros ameaçados) ou decidir um
+        tabuleiro (e talvez o jogo). As demais perdem na hora, então a
+        vitória encontrada é forçada pelas regras de `make_move`. Retorna
+        (jogada, número de meias-jogadas até a vitória) ou None se não achar
+        dentro de `threat_budget` nós.
+        """
+        try:
+            for depth in range(THREAT_SEARCH_DEPTH + 1):
+                move = self._threat_attack(state, depth)
+                if move is not None:
+                    return move, 2 * depth + 1
+        except _ThreatBudgetExhausted:
+            pass
+        return None
+
+    def _threat_attack(self, state, depth):
+        """Nó OU: jogada do atacante que força a vitória em `depth` ameaças, ou None."""
+        attacker = self.player
+        wins = self._immediate_wins(state, attacker)
+        if wins:
+            return min(wins)
+        if depth == 0:
+            return None
+
+        for move in self._threat_candidates(state, attacker):
+            self._count_threat_node()
+            self._apply_move(state, move, attacker)
+            result = self._state_result(state)
+            if result is not None:
+                forced = result == attacker  # Ex.: desempate por vitórias pequenas
+            else:
+                forced = (bool(self._immediate_wins(state, attacker)) and
+                          self._threat_defend(state, depth))
+            self._undo_move(state, move)
+            if forced:
+                return move
+        return None
+
+    def _threat_defend(self, state, depth):
+        """Nó E: True se toda defesa ainda perde (o atacante tem ameaças pendentes)."""
+        attacker = self.player
+        defender = Player.X if attacker == Player.O else Player.O
+        if self._immediate_wins(state, defender):
+            return False
+
+        targets = {move[:2] for move in self._immediate_wins(state, attacker)}
+        for move in self._get_valid_moves_from_state(state):
+            board = state['boards'][move[0] * 3 + move[1]]
+            if move[:2] not in targets and not self._decides_board(board, move, defender):
+                continue  # Não anula nada: o atacante vence na jogada seguinte
+            self._count_threat_node()
+            self._apply_move(state, move, defender)
+            result = self._state_result(state)
+            if result is not None:
+                forced = result == attacker
+            else:
+                forced = self._threat_attack(state, depth - 1) is not None
+            self._undo_move(state, move)
+            if not forced:
+                return False
+        return True
+
+    def _threat_candidates(self, state, player):
+        """Jogadas do atacante que podem criar ameaças: conquistas de tabuleiros,
+        jogadas nos tabuleiros que completariam uma linha principal e jogadas
+        que decidem um tabuleiro (o jogo pode acabar no desempate)."""
+        main = state['main_board']
+        targets = set()
+        for line in _LINE_CELLS:
+            cells = [main[row][col] for row, col in line]
+            if cells.count(player) == 2 and cells.count(Player.EMPTY) == 1:
+                targets.add(line[cells.index(Player.EMPTY)])
+        return [move for move in self._get_valid_moves_from_state(state)
+                if move[:2] in targets or
+                self._decides_board(state['boards'][move[0] * 3 + move[1]], move, player)]
+
+    def _decides_board(self, board, move, player):
+        """True se `player` jogando `move` vence o tabuleiro ou o completa."""
+        _, _, row, col = move
+        if sum(cell == Player.EMPTY for board_row in board for cell in board_row) == 1:
+            return True
+        for line in _LINE_CELLS:
+            if (row, col) in line and sum(board[r][c] == player for r, c in line) == 2:
+                return True
+        return False
+
+    def _immediate_wins(self, state, player):
+        """Jogadas com que `player` vence o jogo agora, completando uma linha principal."""
+        main = state['main_board']
+        wins = []
+        for line in _LINE_CELLS:
+            cells = [main[row][col] for row, col in line]
+            if cells.count(player) != 2 or cells.count(Player.EMPTY) != 1:
+                continue
+            main_row, main_col = line[cells.index(Player.EMPTY)]
+            board = state['boards'][main_row * 3 + main_col]
+            for small_line in _LINE_CELLS:
+                small = [board[row][col] for row, col in small_line]
+                if small.count(player) == 2 and small.count(Player.EMPTY) == 1:
+                    wins.append((main_row, main_col) + small_line[small.index(Player.EMPTY)])
+        return wins
+
+    def _state_result(self, state):
+        """Vencedor se a partida acabou no estado da busca (regras de `make_move`), senão None."""
+        winner = self._check_game_winner(state)
+        if winner is not None:
+            # Uma linha de empates conta como vitória de O, como em make_move
+            return Player.X if winner == Player.X else Player.O
+        main = state['main_board']
+        if self._is_board_full_state(main):
+            x_wins = sum(row.count(Player.X) for row in main)
+            o_wins = sum(row.count(Player.O) for row in main)
+            if x_wins != o_wins:
+                return Player.X if x_wins > o_wins else Player.O
+            return Player.TIE
+        return None
+
+    def _count_threat_node(self):
+        self.threat_nodes += 1
+        if self.threat_nodes > self.threat_budget:
+            raise _ThreatBudgetExhausted()
+        if self.abort_check and self.threat_nodes % 256 == 0 and self.abort_check():
+            raise SearchAborted()
+
+    def score_moves(self, game, depth):
+        """Pontuação exata de cada jogada válida com busca completa em `depth`.
+
+        Diferente de `_search_root`, que só prova que as outras jogadas não
+        superam a melhor, aqui cada jogada tem janela completa (usado pelo
+        mapa de análise). Pontuações do ponto de vista de `self.player`.
+        """
+        state = self._copy_game_state(game)
+        self._killers = [[None, None] for _ in range(depth + 1)]
+        moves = self._get_valid_moves(game)
+        if depth == 1 and self.evaluator is not None:
+            return dict(zip(moves, self._leaf_scores(state, moves, self.player, 1)))
+        scores = {}
+        for move in moves:
+            self._apply_move(state, move, self.player)
+            scores[move] = -self._negamax(state, depth - 1, float("-inf"), float("inf"), -1, 1)
+            self._undo_move(state, move)
+        return scores
+
+    def _search_root(self, state, moves, depth, alpha, beta):
+        """Busca PVS na raiz; retorna (melhor jogada, pontuação)."""
+        best_move = None
+        best_score = float("-inf")
+        leaf_scores = self._root_leaf_scores(state, moves, depth)
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                score = leaf_scores[index]
+            else:
+                self._apply_move(state, move, self.player)
+                if best_move is None:
+                    score = -self._negamax(state, depth - 1, -beta, -alpha, -1, 1)
+                else:
+                    # Janela nula: só interessa saber se supera a melhor até agora
+                    score = -self._negamax(state, depth - 1, -alpha - NULL_WINDOW, -alpha, -1, 1)
+                    if alpha < score < beta:
+                        score = -self._negamax(state, depth - 1, -beta, -alpha, -1, 1)
+                self._undo_move(state, move)
+
+            best_score = max(best_score, score)
+            if score > alpha:
+                alpha = score
+                best_move = move
+            if alpha >= beta:
+                break
+        return best_move, best_score
+
+    def _search_root_multi_pv(self, state, moves, depth, count):
+        """Pontuação exata das `count` melhores jogadas da raiz, da melhor para a pior.
+
+        Depois de `count` jogadas, cada nova só é buscada com janela nula
+        contra a `count`-ésima pontuação; se a superar, é refeita com janela
+        aberta acima dela. Empates ficam com a jogada que veio antes em `moves`.
+        """
+        top = []
+        bound = float("-inf")
+        leaf_scores = self._root_leaf_scores(state, moves, depth)
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                score = leaf_scores[index]
+            else:
+                self._apply_move(state, move, self.player)
+                if len(top) < count:
+                    score = -self._negamax(state, depth - 1, float("-inf"), float("inf"), -1, 1)
+                else:
+                    score = -self._negamax(state, depth - 1, -bound - NULL_WINDOW, -bound, -1, 1)
+                    if score > bound:
+                        score = -self._negamax(state, depth - 1, float("-inf"), -bound, -1, 1)
+                self._undo_move(state, move)
+
+            if len(top) < count or score > bound:
+                top.append((move, score))
+                top.sort(key=lambda item: -item[1])  # Estável: empates mantêm a ordem
+                del top[count:]
+                if len(top) == count:
+                    bound = top[-1][1]
+        return top
+
+    def _negamax(self, state, depth, alpha, beta, color, ply):
+        """Negamax com poda alfa-beta e PVS (busca de variação principal).
+
+        `color` é 1 quando a CPU está na vez e -1 para o oponente; o valor
+        retornado é do ponto de vista de quem joga, ou seja, `color` vezes o
+        valor do minimax original.
+        """
+        self.nodes += 1
+        if self.nodes > self._node_limit:
+            raise _NodeBudgetExhausted()
+        if self.abort_check and self.nodes % 256 == 0 and self.abort_check():
+            raise SearchAborted()
+        # Verifica condições de parada
+        winner = self._check_game_winner(state)
+        if winner == self.player:
+            return color * (100 + depth)  # Prefere vitórias mais rápidas
+        elif winner == (Player.X if self.player == Player.O else Player.O):
+            return color * (-100 - depth)  # Evita derrotas mais rápidas
+        player = self.player if color == 1 else (Player.X if self.player == Player.O else Player.O)
+        if winner == Player.TIE or depth == 0:
+            return color * self._evaluate_position(state, player)
+
+        valid_moves = self._get_valid_moves_from_state(state)
+        if not valid_moves:
+            return color * self._evaluate_position(state, player)
+        if depth == 1 and self.evaluator is not None:
+            return self._evaluate_frontier(state, valid_moves, player, color)
+
+        # Ordenação: jogadas que já causaram poda nesta profundidade primeiro
+        for killer in reversed(self._killers[ply]):
+            if killer is not None and killer in valid_moves:
+                valid_moves.remove(killer)
+                valid_moves.insert(0, killer)
+
+        best_score = float("-inf")
+        for index, move in enumerate(valid_moves):
+            self._apply_move(state, move, player)
+            if index == 0 or alpha == float("-inf"):
+                score = -self._negamax(state, depth - 1, -beta, -alpha, -color, ply + 1)
+            else:
+                score = -self._negamax(state, depth - 1, -alpha - NULL_WINDOW, -alpha, -color, ply + 1)
+                if alpha < score < beta:
+                    score = -self._negamax(state, depth - 1, -beta, -alpha, -color, ply + 1)
+            self._undo_move(state, move)
+
+            best_score = max(best_score, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                killers = self._killers[ply]
+                if killers[0] != move:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                break  # Poda alfa-beta
+        return best_score
+
+    def _evaluate_frontier(self, state, moves, player, color):
+        """Nó de profundidade 1 com avaliador: todas as folhas filhas em um só lote.
+
+        Sem poda entre as folhas, mas o resultado é o mesmo máximo que a
+        busca calcularia folha a folha.
+        """
+        return max(self._leaf_scores(state, moves, player, color))
+
+    def _root_leaf_scores(self, state, moves, depth):
+        """Na iteração de profundidade 1 com avaliador, as pontuações das jogadas da raiz em lote."""
+        if depth == 1 and self.evaluator is not None:
+            return self._leaf_scores(state, moves, self.player, 1)
+        return None
+
+    def _leaf_scores(self, state, moves, player, color):
+        """Pontuação de cada jogada de `moves` com as posições filhas avaliadas em um só lote.
+
+        Os mesmos valores de `_negamax` na profundidade 0, do ponto de vista
+        de quem joga no nó (`player`, com `color`).
+        """
+        if self.abort_check and self.abort_check():
+            raise SearchAborted()
+        opponent = Player.X if self.player == Player.O else Player.O
+        next_side = Player.X if player == Player.O else Player.O
+        scores = []
+        encoded, pending = [], []
+        if self.nodes + len(moves) > self._node_limit:
+            raise _NodeBudgetExhausted()
+        for move in moves:
+            self.nodes += 1
+            self._apply_move(state, move, player)
+            winner = self._check_game_winner(state)
+            if winner == self.player:
+                scores.append(color * 100)
+            elif winner == opponent:
+                scores.append(color * -100)
+            else:
+                pending.append(len(scores))
+                scores.append(None)
+                encoded.append(self.evaluator.encode(state["boards"], state["main_board"], next_side))
+            self._undo_move(state, move)
+        if encoded:
+            # Pontuações do ponto de vista de X -> de quem joga neste nó
+            sign = color if self.player == Player.X else -color
+            for index, score in zip(pending, self.evaluator.evaluate_batch(encoded)):
+                scores[index] = sign * score
+        return scores
+
+    def _evaluate_position(self, game_state_dict, side_to_move=None):
+        """Avalia a posição atual do jogo."""
+        if self.evaluator is not None:
+            side = side_to_move or game_state_dict["current_player"]
+            encoded = self.evaluator.encode(game_state_dict["boards"], game_state_dict["main_board"], side)
+            score = self.evaluator.evaluate_batch([encoded])[0]
+            return score if self.player == Player.X else -score
+
+        if self.eval_weights is not None:
+            features = extract_features(game_state_dict["boards"], game_state_dict["main_board"])
+            score = sum(w * f for w, f in zip(self.eval_weights, features))
+            return score if self.player == Player.X else -score
+
+        score = 0
+
+        # Avalia tabuleiro principal
+        score += self._evaluate_board(game_state_dict["main_board"]) * 10
+
+        # Avalia tabuleiros pequenos
+        for i, board in enumerate(game_state_dict["boards"]):
+            board_score = self._evaluate_board(board)
+            score += board_score
+
+            # Bônus por controlar tabuleiros centrais e cantos
+            main_row, main_col = i // 3, i % 3
+            if main_row == 1 and main_col == 1:  # Centro
+                score += board_score * 0.5
+            elif (main_row, main_col) in [(0, 0), (0, 2), (2, 0), (2, 2)]:  # Cantos
+                score += board_score * 0.3
+
+        return score
+
+    def _evaluate_board(self, board):
+        """Avalia um tabuleiro 3x3."""
+        score = 0
+
+        # Verifica linhas, colunas e diagonais
+        lines = []
+        # Linhas
+        for row in board:
+            lines.append(row)
+        # Colunas
+        for col in range(3):
+            lines.append([board[row][col] for row in range(3)])
+        # Diagonais
+        lines.append([board[i][i] for i in range(3)])
+        lines.append([board[i][2 - i] for i in range(3)])
+
+        for line in lines:
+            score += self._evaluate_line(line)
+
+        return score
+
+    def _evaluate_line(self, line):
+        """Avalia uma linha de 3 células."""
+        my_count = line.count(self.player)
+        opp_count = line.count(Player.X if self.player == Player.O else Player.O)
+        empty_count = line.count(Player.EMPTY)
+
+        if my_count == 3:
+            return 50
+        elif my_count == 2 and empty_count == 1:
+            return 10
+        elif my_count == 1 and empty_count == 2:
+            return 1
+        elif opp_count == 3:
+            return -50
+        elif opp_count == 2 and empty_count == 1:
+            return -10
+        elif opp_count == 1 and empty_count == 2:
+            return -1
+
+        return 0
+
+    def _copy_game_state(self, game):
+        """Cria uma cópia do estado do jogo a partir do objeto UltimateTicTacToe."""
+        return {
+            'boards': [[[cell for cell in row] for row in board] for board in game.boards],
+            'main_board': [[cell for cell in row] for row in game.main_board],
+            'current_player': game.current_player,
+            'game_state': game.game_state
+        }
+
+    def _apply_move(self, game_state_dict, move, player):
+        """Faz uma jogada no estado da busca (desfeita com `_undo_move`)."""
+        main_row, main_col, row, col = move
+        board = game_state_dict['boards'][main_row * 3 + main_col]
+        board[row][col] = player
+
+        # Verifica vitória no tabuleiro pequeno
+        winner = self._check_winner_board(board)
+        if winner:
+            game_state_dict['main_board'][main_row][main_col] = winner
+        elif self._is_board_full_state(board):
+            game_state_dict['main_board'][main_row][main_col] = Player.TIE
+
+    def _undo_move(self, game_state_dict, move):
+        """Desfaz uma jogada de `_apply_move` (o tabuleiro estava em jogo antes dela)."""
+        main_row, main_col, row, col = move
+        game_state_dict['boards'][main_row * 3 + main_col][row][col] = Player.EMPTY
+        game_state_dict['main_board'][main_row][main_col] = Player.EMPTY
+
+    def _check_winner_board(self, board):
+        """Verifica vencedor em um tabuleiro."""
+        # Linhas
+        for row in board:
+            if row[0] == row[1] == row[2] and row[0] != Player.EMPTY:
+                return row[0]
+        # Colunas
+        for col in range(3):
+            if board[0][col] == board[1][col] == board[2][col] and board[0][col] != Player.EMPTY:
+                return board[0][col]
+        # Diagonais
+        if board[0][0] == board[1][1] == board[2][2] and board[0][0] != Player.EMPTY:
+            return board[0][0]
+        if board[0][2] == board[1][1] == board[2][0] and board[0][2] != Player.EMPTY:
+            return board[0][2]
+        return None
+
+    def _check_game_winner(self, game_state_dict):
+        """Verifica vencedor do jogo principal."""
+        return self._check_winner_board(game_state_dict['main_board'])
+
+    def _is_board_full_state(self, board):
+        """Verifica se um tabuleiro está cheio."""
+        return all(cell != Player.EMPTY for row in board for cell in row)
+
+    def _get_valid_moves_from_state(self, game_state_dict):
+        """Retorna jogadas válidas de um estado do jogo."""
+        valid_moves = []
+        for main_row in range(3):
+            for main_col in range(3):
+                if game_state_dict['main_board'][main_row][main_col] == Player.EMPTY:
+                    board_index = main_row * 3 + main_col
+                    for row in range(3):
+                        for col in range(3):
+                            if game_state_dict['boards'][board_index][row][col] == Player.EMPTY:
+                                valid_moves.append((main_row, main_col, row, col))
+        return valid_moves
+
+    def _get_valid_moves(self, game):
+        """Retorna todas as jogadas válidas."""
+        valid_moves = []
+        for main_row in range(3):
+            for main_col in range(3):
+                if game.main_board[main_row][main_col] == Player.EMPTY:
+                    board_index = game.get_board_index(main_row, main_col)
+                    for row in range(3):
+                        for col in range(3):
+                            if game.boards[board_index][row][col] == Player.EMPTY:
+                                valid_moves.append((main_row, main_col, row, col))
+        return valid_moves
+
+    def _can_win_small_board(self, game, main_row, main_col, row, col):
+        """Verifica se a jogada pode vencer um tabuleiro pequeno."""
+        small_threats, _ = game.get_threats()
+        return (row, col) in small_threats[game.get_board_index(main_row, main_col)][self.player]
+
+    def _can_block_small_board(self, game, main_row, main_col, row, col):
+        """Verifica se a jogada pode bloquear vitória do oponente em tabuleiro pequeno."""
+        small_threats, _ = game.get_threats()
+        opponent = Player.X if self.player == Player.O else Player.O
+        return (row, col) in small_threats[game.get_board_index(main_row, main_col)][opponent]
+
+    def _can_win_main_board(self, game, main_row, main_col, row, col):
+        """Verifica se a jogada pode vencer o jogo principal."""
+        _, main_threats = game.get_threats()
+        return ((main_row, main_col) in main_threats[self.player] and
+                self._can_win_small_board(game, main_row, main_col, row, col))
+
+    def _can_block_main_board(self, game, main_row, main_col, row, col):
+        """Verifica se a jogada pode bloquear vitória do oponente no jogo principal."""
+        _, main_threats = game.get_threats()
+        opponent = Player.X if self.player == Player.O else Player.O
+        return ((main_row, main_col) in main_threats[opponent] and
+                self._can_block_small_board(game, main_row, main_col, row, col))
+
+
+def _ponder_worker(jobs, results, generation, cache_path):
+    """Processo de pondering: para cada resposta provável do humano, calcula
+    a jogada da CPU e envia (geração, posição, jogada) para `results`.
+
+    Um trabalho é abandonado assim que `generation` muda (novo trabalho ou
+    cancelamento) ou quando o orçamento de tempo de CPU se esgota.
+    """
+    search_cache = open_search_cache(cache_path) if cache_path else None
+    while True:
+        job = jobs.get()
+        if job is None:
+            if search_cache is not None:
+                search_cache.close()
+            break
+        job_generation, position, difficulty, max_depth, budget = job
+        started = time.process_time()
+
+        def should_stop():
+            return (generation.value != job_generation or
+                    time.process_time() - started > budget)
+
+        game = notation.parse_position(position)
+        human = CPUPlayer("medium", player=game.current_player)
+        for reply in human.rank_likely_moves(game):
+            if should_stop():
+                break
+            after_reply = GameCore()
+            after_reply.set_position(game)
+            after_reply.make_move(*reply)
+            if after_reply.game_state != GameState.PLAYING:
+                continue
+            cpu = CPUPlayer(difficulty, player=after_reply.current_player, max_depth=max_depth,
+                            search_cache=search_cache)
+            cpu.abort_check = should_stop
+            try:
+                move = cpu.get_best_move(after_reply)
+            except SearchAborted:
+                break
+            results.put((job_generation, notation.format_position(after_reply), move))
+
+
+def _analysis_worker(jobs, results, generation):
+    """Processo de análise: aprofunda a pontuação de todas as jogadas da posição
+    e envia (geração, profundidade, pontuações) a cada profundidade concluída.
+
+    Um trabalho é abandonado assim que `generation` muda (a posição mudou).
+    """
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_generation, position, max_depth = job
+        game = notation.parse_position(position)
+        cpu = CPUPlayer("hard", player=game.current_player)
+        cpu.abort_check = lambda: generation.value != job_generation
+        for depth in range(1, max_depth + 1):
+            try:
+                scores = cpu.score_moves(game, depth)
+            except SearchAborted:
+                break
+            results.put((job_generation, depth, scores))
+
+
+class Analyzer:
+    """Análise contínua da posição em um processo dedicado (mapa de análise).
+
+    `start` troca a posição analisada; `poll` devolve, sem bloquear, as
+    pontuações da maior profundidade concluída para a posição atual.
+    """
+    def __init__(self, max_depth):
+        self.max_depth = max_depth
+        self.depth = 0
+        self.scores = {}
+        self._job_generation = None
+        self._generation = multiprocessing.Value('i', 0)
+        self._jobs = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_analysis_worker, args=(self._jobs, self._results, self._generation),
+            daemon=True)
+        self._process.start()
+
+    def start(self, game):
+        """Começa a analisar a posição de `game` (descarta a análise anterior)."""
+        self.depth = 0
+        self.scores = {}
+        with self._generation.get_lock():
+            self._generation.value += 1
+            self._job_generation = self._generation.value
+        if game.game_state == GameState.PLAYING:
+            self._jobs.put((self._job_generation, notation.format_position(game), self.max_depth))
+
+    def stop(self):
+        """Interrompe a análise em andamento."""
+        with self._generation.get_lock():
+            self._generation.value += 1
+        self._job_generation = None
+
+    def poll(self):
+        """Recolhe os resultados prontos; retorna True se as pontuações mudaram."""
+        changed = False
+        while True:
+            try:
+                generation, depth, scores = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._job_generation and depth > self.depth:
+                self.depth, self.scores = depth, scores
+                changed = True
+        return changed
+
+    def close(self):
+        self.stop()
+        self._jobs.put(None)
+        self._process.join(timeout=1)
+
+
+class Ponderer:
+    """Pesquisa em segundo plano durante a vez do humano.
+
+    Mantém um processo dedicado (o laço da interface não perde quadros) e uma
+    tabela posição -> jogada da CPU. Quando o humano joga, `lookup` devolve a
+    resposta já calculada para a posição resultante, se houver.
+    """
+    def __init__(self, cpu_budget, cache_path=None):
+        self.cpu_budget = cpu_budget  # Segundos de CPU por vez do humano
+        self.table = {}
+        self._job_generation = None  # Geração do último trabalho iniciado
+        self._generation = multiprocessing.Value('i', 0)
+        self._jobs = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_ponder_worker, args=(self._jobs, self._results, self._generation, cache_path),
+            daemon=True)
+        self._process.start()
+
+    def start(self, game, difficulty, max_depth):
+        """Começa a pensar nas respostas à posição atual (o humano está na vez)."""
+        self.table = {}
+        with self._generation.get_lock():
+            self._generation.value += 1
+            self._job_generation = self._generation.value
+        self._jobs.put((self._job_generation, notation.format_position(game), difficulty,
+                        max_depth, self.cpu_budget))
+
+    def stop(self):
+        """Interrompe a busca atual, preservando o que já foi calculado."""
+        with self._generation.get_lock():
+            self._generation.value += 1
+
+    def clear(self):
+        """Interrompe a busca e descarta a tabela (reinício ou troca de modo)."""
+        self.stop()
+        self._job_generation = None
+        self.table = {}
+
+    def poll(self):
+        """Recolhe os resultados prontos sem bloquear."""
+        while True:
+            try:
+                generation, position, move = self._results.get_nowait()
+            except queue.Empty:
+                break
+            # Resultados de trabalhos anteriores ao último `start` são descartados
+            if generation == self._job_generation:
+                self.table[position] = move
+
+    def lookup(self, game):
+        """Jogada calculada para a posição atual, ou None."""
+        self.poll()
+        return self.table.get(notation.format_position(game))
+
+    def close(self):
+        self.stop()
+        self._jobs.put(None)
+        self._process.join(timeout=1)
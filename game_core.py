@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""Regras do Ultimate Tic-Tac-Toe sem dependência do pygame.
+
+Usado pela interface gráfica, pelo servidor e pelas ferramentas de linha de
+comando, que precisam das mesmas regras de `make_move` sem abrir uma janela.
+"""
+from enum import Enum
+from dataclasses import dataclass
+from typing import Optional, List
+
+# --- Enums e Classes de Dados ---
+class Player(Enum):
+    X = 'X'
+    O = 'O'
+    EMPTY = ' '
+    TIE = '-'
+
+class GameState(Enum):
+    PLAYING = "playing"
+    X_WINS = "x_wins"
+    O_WINS = "o_wins"
+    TIE = "tie"
+
+class GameMode(Enum):
+    HUMAN_VS_HUMAN = "human_vs_human"
+    HUMAN_VS_CPU = "human_vs_cpu"
+
+@dataclass
+class GameStats:
+    x_wins: int = 0
+    o_wins: int = 0
+    ties: int = 0
+    total_games: int = 0
+
+# Linhas de um tabuleiro 3x3 como coordenadas (linha, coluna)
+LINES = (
+    ((0, 0), (0, 1), (0, 2)), ((1, 0), (1, 1), (1, 2)), ((2, 0), (2, 1), (2, 2)),  # Linhas
+    ((0, 0), (1, 0), (2, 0)), ((0, 1), (1, 1), (2, 1)), ((0, 2), (1, 2), (2, 2)),  # Colunas
+    ((0, 0), (1, 1), (2, 2)), ((0, 2), (1, 1), (2, 0)),                            # Diagonais
+)
+
+
+def board_threats(board):
+    """Células vazias que completariam uma linha em um tabuleiro 3x3, por jogador."""
+    threats = {Player.X: set(), Player.O: set()}
+    for line in LINES:
+        cells = [board[row][col] for row, col in line]
+        if cells.count(Player.EMPTY) != 1:
+            continue
+        for player in (Player.X, Player.O):
+            if cells.count(player) == 2:
+                threats[player].add(line[cells.index(Player.EMPTY)])
+    return threats
+
+
+class GameCore:
+    """Estado e regras de uma partida, sem interface gráfica."""
+    def __init__(self):
+        self.boards = self.create_boards()
+        self.main_board = [[Player.EMPTY for _ in range(3)] for _ in range(3)]
+        self.current_player = Player.X
+        self.game_state = GameState.PLAYING
+        self.last_move = None
+
+        # Contador de vitórias para desempate
+        self.small_wins_x = 0
+        self.small_wins_o = 0
+
+        # Índice de ameaças (ver get_threats), criado sob demanda
+        self._threats = None
+
+    def create_boards(self):
+        """Cria a estrutura de dados para os 9 tabuleiros."""
+        return [[[Player.EMPTY for _ in range(3)] for _ in range(3)] for _ in range(9)]
+
+    def reset(self):
+        """Volta ao estado inicial da partida."""
+        self.boards = self.create_boards()
+        self.main_board = [[Player.EMPTY for _ in range(3)] for _ in range(3)]
+        self.current_player = Player.X
+        self.game_state = GameState.PLAYING
+        self.last_move = None
+        # Reset dos contadores de vitórias pequenas
+        self.small_wins_x = 0
+        self.small_wins_o = 0
+        self._threats = None
+
+    def get_board_index(self, main_row: int, main_col: int) -> int:
+        """Converte coordenadas para índice do tabuleiro."""
+        return main_row * 3 + main_col
+
+    def check_winner(self, board: List[List[Player]]) -> Optional[Player]:
+        """Verifica vencedor em um tabuleiro 3x3."""
+        # Linhas
+        for row in board:
+            if row[0] == row[1] == row[2] and row[0] != Player.EMPTY:
+                return row[0]
+
+        # Colunas
+        for col in range(3):
+            if board[0][col] == board[1][col] == board[2][col] and board[0][col] != Player.EMPTY:
+                return board[0][col]
+
+        # Diagonais
+        if board[0][0] == board[1][1] == board[2][2] and board[0][0] != Player.EMPTY:
+            return board[0][0]
+        if board[0][2] == board[1][1] == board[2][0] and board[0][2] != Player.EMPTY:
+            return board[0][2]
+
+        return None
+
+    def is_board_full(self, board: List[List[Player]]) -> bool:
+        """Verifica se um tabuleiro está cheio."""
+        return all(cell != Player.EMPTY for row in board for cell in row)
+
+    def count_small_wins(self):
+        """Conta vitórias nos tabuleiros pequenos."""
+        x_wins = 0
+        o_wins = 0
+
+        for main_row in range(3):
+            for main_col in range(3):
+                winner = self.main_board[main_row][main_col]
+                if winner == Player.X:
+                    x_wins += 1
+                elif winner == Player.O:
+                    o_wins += 1
+
+        return x_wins, o_wins
+
+    def is_valid_move(self, main_row: int, main_col: int, row: int, col: int) -> bool:
+        """Verifica se a jogada é permitida no estado atual."""
+        if not all(0 <= value < 3 for value in (main_row, main_col, row, col)):
+            return False
+        if self.game_state != GameState.PLAYING:
+            return False
+        if self.main_board[main_row][main_col] != Player.EMPTY:
+            return False
+        board_index = self.get_board_index(main_row, main_col)
+        return self.boards[board_index][row][col] == Player.EMPTY
+
+    def get_valid_moves(self):
+        """Retorna todas as jogadas válidas no formato (main_row, main_col, row, col)."""
+        valid_moves = []
+        if self.game_state != GameState.PLAYING:
+            return valid_moves
+        for main_row in range(3):
+            for main_col in range(3):
+                if self.main_board[main_row][main_col] == Player.EMPTY:
+                    board_index = self.get_board_index(main_row, main_col)
+                    for row in range(3):
+                        for col in range(3):
+                            if self.boards[board_index][row][col] == Player.EMPTY:
+                                valid_moves.append((main_row, main_col, row, col))
+        return valid_moves
+
+    def make_move(self, main_row: int, main_col: int, row: int, col: int) -> bool:
+        """Executa uma jogada se for válida."""
+        board_index = self.get_board_index(main_row, main_col)
+
+        # Validações básicas
+        if self.game_state != GameState.PLAYING:
+            return False
+
+        if self.main_board[main_row][main_col] != Player.EMPTY:
+            return False
+
+        if self.boards[board_index][row][col] != Player.EMPTY:
+            return False
+
+        # Executa a jogada
+        self.boards[board_index][row][col] = self.current_player
+        self.last_move = (main_row, main_col, row, col)
+
+        # Verifica vitória no tabuleiro menor
+        winner = self.check_winner(self.boards[board_index])
+        if winner:
+            self.main_board[main_row][main_col] = winner
+            # Atualiza contador de vitórias pequenas
+            if winner == Player.X:
+                self.small_wins_x += 1
+            elif winner == Player.O:
+                self.small_wins_o += 1
+        elif self.is_board_full(self.boards[board_index]):
+            self.main_board[main_row][main_col] = Player.TIE
+        self._update_threats(board_index)
+
+        # Verifica vitória geral
+        game_winner = self.check_winner(self.main_board)
+        if game_winner:
+            if game_winner == Player.X:
+                self.game_state = GameState.X_WINS
+            else:
+                self.game_state = GameState.O_WINS
+            self.on_game_over()
+        elif self.is_board_full(self.main_board):
+            # Verifica empate no jogo maior
+            # Determina vencedor por mais vitórias nos jogos menores
+            if self.small_wins_x > self.small_wins_o:
+                self.game_state = GameState.X_WINS
+            elif self.small_wins_o > self.small_wins_x:
+                self.game_state = GameState.O_WINS
+            else:
+                # Empate real (mesmo número de vitórias pequenas)
+                self.game_state = GameState.TIE
+            self.on_game_over()
+
+        # Troca jogador
+        if self.game_state == GameState.PLAYING:
+            self.current_player = Player.O if self.current_player == Player.X else Player.X
+
+        return True
+
+    def get_threats(self):
+        """Índice de ameaças: (ameaças por tabuleiro pequeno, ameaças no principal).
+
+        Para cada tabuleiro pequeno em jogo, `small[board_index][player]` é o
+        conjunto de células (row, col) que completariam uma linha de `player`;
+        tabuleiros já decididos ficam vazios. `main[player]` é o conjunto de
+        posições (main_row, main_col) livres que completariam uma linha no
+        tabuleiro principal. Construído na primeira consulta e depois mantido
+        por `make_move`, que só recalcula o tabuleiro jogado.
+        """
+        if self._threats is None:
+            small = [self._small_board_threats(board_index) for board_index in range(9)]
+            self._threats = (small, board_threats(self.main_board))
+        return self._threats
+
+    def _small_board_threats(self, board_index):
+        main_row, main_col = divmod(board_index, 3)
+        if self.main_board[main_row][main_col] != Player.EMPTY:
+            return {Player.X: set(), Player.O: set()}
+        return board_threats(self.boards[board_index])
+
+    def _update_threats(self, board_index):
+        """Atualiza o índice de ameaças depois de uma jogada em `board_index`."""
+        if self._threats is None:
+            return
+        small, main = self._threats
+        small[board_index] = self._small_board_threats(board_index)
+        main_row, main_col = divmod(board_index, 3)
+        if self.main_board[main_row][main_col] != Player.EMPTY:
+            main.update(board_threats(self.main_board))
+
+    def to_dict(self):
+        """Exporta o estado em formato serializável (JSON)."""
+        return {
+            'boards': [''.join(cell.value for row in board for cell in row) for board in self.boards],
+            'main_board': ''.join(cell.value for row in self.main_board for cell in row),
+            'current_player': self.current_player.value,
+            'game_state': self.game_state.value,
+            'last_move': list(self.last_move) if self.last_move else None,
+            'small_wins_x': self.small_wins_x,
+            'small_wins_o': self.small_wins_o,
+        }
+
+    @classmethod
+    def from_fields(cls, boards, main_board, current_player, game_state,
+                    small_wins_x, small_wins_o, last_move=None):
+        """Monta uma partida a partir de campos já validados (sem conferir nada)."""
+        game = cls.__new__(cls)
+        game.boards = boards
+        game.main_board = main_board
+        game.current_player = current_player
+        game.game_state = game_state
+        game.last_move = last_move
+        game.small_wins_x = small_wins_x
+        game.small_wins_o = small_wins_o
+        game._threats = None
+        return game
+
+    def set_position(self, other):
+        """Copia a posição de outra partida para esta (ex.: ao colar uma posição)."""
+        self.boards = [[row[:] for row in board] for board in other.boards]
+        self.main_board = [row[:] for row in other.main_board]
+        self.current_player = other.current_player
+        self.game_state = other.game_state
+        self.last_move = other.last_move
+        self.small_wins_x = other.small_wins_x
+        self.small_wins_o = other.small_wins_o
+        self._threats = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Cria uma partida a partir do formato de `to_dict` (valida os campos)."""
+        symbols = {player.value: player for player in Player}
+        try:
+            boards = data['boards']
+            if len(boards) != 9 or any(len(board) != 9 for board in boards):
+                raise ValueError("boards deve ter 9 tabuleiros de 9 células")
+            game = cls()
+            for board_index, board in enumerate(boards):
+                for cell_index, symbol in enumerate(board):
+                    if symbols[symbol] == Player.TIE:
+                        raise ValueError("célula não pode ser '-'")
+                    game.boards[board_index][cell_index // 3][cell_index % 3] = symbols[symbol]
+            game.current_player = symbols[data.get('current_player', 'X')]
+            if game.current_player not in (Player.X, Player.O):
+                raise ValueError("current_player deve ser 'X' ou 'O'")
+            last_move = data.get('last_move')
+            game.last_move = tuple(last_move) if last_move else None
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"posição inválida: {e}") from e
+
+        # O tabuleiro principal e os contadores são derivados das células
+        for board_index, board in enumerate(game.boards):
+            main_row, main_col = divmod(board_index, 3)
+            winner = game.check_winner(board)
+            if winner:
+                game.main_board[main_row][main_col] = winner
+            elif game.is_board_full(board):
+                game.main_board[main_row][main_col] = Player.TIE
+        game.small_wins_x, game.small_wins_o = game.count_small_wins()
+
+        game_winner = game.check_winner(game.main_board)
+        if game_winner:
+            game.game_state = GameState.X_WINS if game_winner == Player.X else GameState.O_WINS
+        elif game.is_board_full(game.main_board):
+            if game.small_wins_x > game.small_wins_o:
+                game.game_state = GameState.X_WINS
+            elif game.small_wins_o > game.small_wins_x:
+                game.game_state = GameState.O_WINS
+            else:
+                game.game_state = GameState.TIE
+        return game
+
+    def on_game_over(self):
+        """Chamado uma vez quando a partida termina (a interface registra estatísticas aqui)."""
+        pass
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Posições imutáveis com compartilhamento estrutural e árvore de histórico.
+
+`Position` guarda cada tabuleiro pequeno como uma tupla de 9 células. Uma
+jogada cria uma nova posição que reaproveita as 8 tuplas dos tabuleiros não
+tocados (e o tabuleiro principal, se ele não mudou), então guardar todas as
+posições de uma partida custa uma fração de copiar as listas aninhadas de
+`UltimateTicTacToe` a cada jogada.
+
+`GameHistory` organiza as posições em árvore: desfazer e refazer só movem um
+ponteiro (O(1)) e jogar outra coisa depois de desfazer abre um novo ramo sem
+perder o anterior.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+from game_core import Player, GameState, GameCore
+
+_LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),  # Linhas
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),  # Colunas
+    (0, 4, 8), (2, 4, 6),             # Diagonais
+)
+_EMPTY_BOARD = (Player.EMPTY,) * 9
+
+
+def _winner(cells):
+    """Mesmo resultado de `GameCore.check_winner` para um tabuleiro em tupla."""
+    for a, b, c in _LINES:
+        if cells[a] == cells[b] == cells[c] and cells[a] != Player.EMPTY:
+            return cells[a]
+    return None
+
+
+class Position(NamedTuple):
+    """Posição imutável; `boards` e `main_board` são tuplas de 9 células."""
+    boards: Tuple[Tuple[Player, ...], ...]
+    main_board: Tuple[Player, ...]
+    current_player: Player
+    game_state: GameState
+    small_wins_x: int
+    small_wins_o: int
+    last_move: Optional[Tuple[int, int, int, int]]
+
+    @classmethod
+    def initial(cls):
+        return cls((_EMPTY_BOARD,) * 9, _EMPTY_BOARD, Player.X, GameState.PLAYING, 0, 0, None)
+
+    @classmethod
+    def from_game(cls, game):
+        """Congela o estado de um GameCore (ou UltimateTicTacToe)."""
+        return cls(
+            tuple(tuple(cell for row in board for cell in row) for board in game.boards),
+            tuple(cell for row in game.main_board for cell in row),
+            game.current_player,
+            game.game_state,
+            game.small_wins_x,
+            game.small_wins_o,
+            game.last_move,
+        )
+
+    def to_game(self):
+        """Cria um GameCore mutável com esta posição."""
+        return GameCore.from_fields(
+            [[list(board[i:i + 3]) for i in (0, 3, 6)] for board in self.boards],
+            [list(self.main_board[i:i + 3]) for i in (0, 3, 6)],
+            self.current_player,
+            self.game_state,
+            self.small_wins_x,
+            self.small_wins_o,
+            self.last_move,
+        )
+
+    def play(self, move):
+        """Retorna a posição após `move`, com as mesmas regras de `make_move`.
+
+        Levanta ValueError se a jogada for inválida.
+        """
+        main_row, main_col, row, col = move
+        board_index = main_row * 3 + main_col
+        cell_index = row * 3 + col
+        board = self.boards[board_index]
+        if (self.game_state != GameState.PLAYING or
+                self.main_board[board_index] != Player.EMPTY or
+                board[cell_index] != Player.EMPTY):
+            raise ValueError(f"jogada inválida: {move}")
+
+        player = self.current_player
+        board = board[:cell_index] + (player,) + board[cell_index + 1:]
+        boards = self.boards[:board_index] + (board,) + self.boards[board_index + 1:]
+
+        main_board = self.main_board
+        small_wins_x, small_wins_o = self.small_wins_x, self.small_wins_o
+        winner = _winner(board)
+        if winner or Player.EMPTY not in board:
+            result = winner or Player.TIE
+            main_board = main_board[:board_index] + (result,) + main_board[board_index + 1:]
+            if winner == Player.X:
+                small_wins_x += 1
+            elif winner == Player.O:
+                small_wins_o += 1
+
+        game_state = GameState.PLAYING
+        if main_board is not self.main_board:
+            game_winner = _winner(main_board)
+            if game_winner:
+                game_state = GameState.X_WINS if game_winner == Player.X else GameState.O_WINS
+            elif Player.EMPTY not in main_board:
+                # Desempate por vitórias nos tabuleiros pequenos
+                if small_wins_x > small_wins_o:
+                    game_state = GameState.X_WINS
+                elif small_wins_o > small_wins_x:
+                    game_state = GameState.O_WINS
+                else:
+                    game_state = GameState.TIE
+
+        if game_state == GameState.PLAYING:
+            player = Player.O if player == Player.X else Player.X
+        return Position(boards, main_board, player, game_state,
+                        small_wins_x, small_wins_o, tuple(move))
+
+
+class HistoryNode:
+    """Nó da árvore de histórico: uma posição e a jogada que levou a ela."""
+    __slots__ = ('position', 'move', 'parent', 'children', 'redo_child')
+
+    def __init__(self, position, move=None, parent=None):
+        self.position = position
+        self.move = move
+        self.parent = parent
+        self.children = None  # Lista de filhos, criada no primeiro (quase sempre 1 ou 2)
+        self.redo_child = None  # Ramo seguido por `redo`
+
+
+class GameHistory:
+    """Árvore de posições com desfazer/refazer em O(1) e ramificação barata."""
+    def __init__(self, position=None):
+        self.root = HistoryNode(position or Position.initial())
+        self.current = self.root
+
+    @property
+    def position(self):
+        return self.current.position
+
+    def play(self, move):
+        """Avança com `move`; reaproveita o ramo se a jogada já foi explorada."""
+        move = tuple(move)
+        parent = self.current
+        if parent.children is None:
+            parent.children = []
+        node = next((child for child in parent.children if child.move == move), None)
+        if node is None:
+            node = HistoryNode(parent.position.play(move), move, parent)
+            parent.children.append(node)
+        parent.redo_child = node
+        self.current = node
+        return node.position
+
+    def can_undo(self):
+        return self.current.parent is not None
+
+    def can_redo(self):
+        return self.current.redo_child is not None
+
+    def undo(self):
+        """Volta uma jogada (o ramo atual continua disponível para `redo`)."""
+        if self.current.parent is not None:
+            self.current = self.current.parent
+        return self.current.position
+
+    def redo(self):
+        """Refaz a última jogada desfeita neste ponto da árvore."""
+        if self.current.redo_child is not None:
+            self.current = self.current.redo_child
+        return self.current.position
+
+    def branch(self):
+        """Nova árvore começando na posição atual (ex.: para análise)."""
+        return GameHistory(self.current.position)
+
+    def moves(self):
+        """Jogadas da raiz até a posição atual."""
+        moves = []
+        node = self.current
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return moves
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Cliente de carga local para o servidor de partidas (server.py).
+
+Abre várias conexões simultâneas, joga partidas humano vs CPU com jogadas
+aleatórias do lado humano e reporta jogadas/s e latência p50/p99 por jogada
+(ida e volta, incluindo a resposta da CPU).
+
+Uso:
+    python server.py --port 8765 &
+    python load_test.py --port 8765 --clients 32 --games 4 --difficulty hard
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+
+def percentile(values, fraction):
+    """Percentil simples (vizinho mais próximo) de uma lista ordenada."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def legal_moves(state):
+    """Jogadas válidas a partir do estado enviado pelo servidor."""
+    moves = []
+    for board_index, board in enumerate(state['boards']):
+        if state['main_board'][board_index] != ' ':
+            continue
+        for cell_index, cell in enumerate(board):
+            if cell == ' ':
+                moves.append((board_index // 3, board_index % 3, cell_index // 3, cell_index % 3))
+    return moves
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def run_client(host, port, games, difficulty, time_limit, seed, latencies, counters):
+    """Joga `games` partidas em sequência por uma conexão."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(games):
+            reply = await request(reader, writer, {'cmd': 'new', 'mode': 'cpu',
+                                                   'difficulty': difficulty,
+                                                   'time_limit': time_limit})
+            state = reply['state']
+            while state['game_state'] == 'playing':
+                move = rng.choice(legal_moves(state))
+                started = time.perf_counter()
+                reply = await request(reader, writer, {'cmd': 'move', 'game': state['game'],
+                                                       'move': list(move)})
+                if not reply['ok']:
+                    if reply.get('error') == 'busy':
+                        counters['busy'] += 1
+                        await asyncio.sleep(0.01)
+                        continue
+                    raise RuntimeError(reply.get('error'))
+                latencies.append(time.perf_counter() - started)
+                counters['moves'] += 1 + ('cpu_move' in reply)
+                counters['timeouts'] += bool(reply.get('timeout'))
+                state = reply['state']
+            await request(reader, writer, {'cmd': 'close', 'game': state['game']})
+            counters['games'] += 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    latencies = []
+    counters = {'moves': 0, 'games': 0, 'busy': 0, 'timeouts': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(args.host, args.port, args.games, args.difficulty, args.time_limit,
+                   args.seed + i, latencies, counters)
+        for i in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"Partidas: {counters['games']}  Jogadas: {counters['moves']}  Tempo: {elapsed:.2f}s")
+    print(f"Jogadas/s: {counters['moves'] / elapsed:.1f}")
+    print(f"Latência por jogada: p50 {percentile(latencies, 0.50) * 1000:.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Respostas 'busy': {counters['busy']}  Tempo estourado: {counters['timeouts']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor de partidas")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=16, help="conexões simultâneas")
+    parser.add_argument("--games", type=int, default=2, help="partidas por conexão")
+    parser.add_argument("--difficulty", default="hard", choices=("easy", "medium", "hard"))
+    parser.add_argument("--time-limit", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
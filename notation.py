@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Notação compacta de posições.
+
+Formato (campos separados por espaço):
+
+    <81 células> <9 tabuleiro principal> <vez> <vitórias X>/<vitórias O>
+
+As 81 células seguem a ordem dos tabuleiros (0 a 8, linha a linha) e, dentro
+de cada tabuleiro, linha a linha: 'X', 'O' ou '.' para vazio. O tabuleiro
+principal usa 'X', 'O', '-' (empate) ou '.' (em jogo) e, assim como os
+contadores de vitórias pequenas, é derivado das células: na leitura ele é
+conferido, não confiado. Exemplo da posição inicial:
+
+    ................................................................................. ......... X 0/0
+"""
+import itertools
+
+from game_core import Player, GameState, GameCore
+
+_chain = itertools.chain.from_iterable
+
+EMPTY_CHAR = '.'
+TIE_CHAR = '-'
+
+_CELL_TO_PLAYER = {'X': Player.X, 'O': Player.O, EMPTY_CHAR: Player.EMPTY}
+_MAIN_TO_PLAYER = dict(_CELL_TO_PLAYER, **{TIE_CHAR: Player.TIE})
+_EMPTY_TO_CHAR = str.maketrans(Player.EMPTY.value, EMPTY_CHAR)
+_CELL_CHARS_TABLE = str.maketrans('', '', 'XO' + EMPTY_CHAR)
+
+_LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),  # Linhas
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),  # Colunas
+    (0, 4, 8), (2, 4, 6),             # Diagonais
+)
+
+
+class NotationError(ValueError):
+    """Texto que não representa uma posição válida."""
+
+
+def _line_owner(cells):
+    """Dono da primeira linha completa (ordem de `check_winner`), ou None."""
+    for a, b, c in _LINES:
+        if cells[a] == cells[b] == cells[c] and cells[a] != EMPTY_CHAR:
+            return cells[a]
+    return None
+
+
+def _board_status(cells):
+    """Situação de um tabuleiro de 9 caracteres, ou None se ele não surge numa partida.
+
+    Um tabuleiro ganho foi decidido pela última peça do vencedor e não
+    recebeu mais nenhuma: tirando alguma peça dele não pode sobrar linha
+    (nem do adversário).
+    """
+    winner = _line_owner(cells)
+    if winner is None:
+        return TIE_CHAR if EMPTY_CHAR not in cells else EMPTY_CHAR
+    for i in range(9):
+        if cells[i] == winner and _line_owner(cells[:i] + EMPTY_CHAR + cells[i + 1:]) is None:
+            return winner
+    return None
+
+
+# Tabelas pré-calculadas para os 3^9 tabuleiros possíveis: a leitura vira
+# consultas em dicionário em vez de verificar linhas célula a célula. São
+# montadas no primeiro uso (~0,1 s), não na importação: o jogo importa este
+# módulo ao abrir, mas só lê posições ao colar uma.
+_BOARD_STATUS = None
+_BOARD_ROWS = None
+_MAIN_ROWS = {''.join(k): tuple(_MAIN_TO_PLAYER[c] for c in k)
+              for k in itertools.product('XO' + EMPTY_CHAR + TIE_CHAR, repeat=3)}
+_BOARD_OFFSETS = range(0, 81, 9)
+
+
+def _board_tables():
+    """Retorna (_BOARD_STATUS, _BOARD_ROWS), montando-as na primeira chamada."""
+    global _BOARD_STATUS, _BOARD_ROWS
+    if _BOARD_STATUS is None:
+        status, rows = {}, {}
+        for cells in itertools.product('XO' + EMPTY_CHAR, repeat=9):
+            key = ''.join(cells)
+            status[key] = _board_status(key)
+            rows[key] = tuple(tuple(_CELL_TO_PLAYER[c] for c in key[i:i + 3]) for i in (0, 3, 6))
+        _BOARD_STATUS, _BOARD_ROWS = status, rows
+    return _BOARD_STATUS, _BOARD_ROWS
+
+
+def format_position(game):
+    """Serializa uma partida (GameCore ou UltimateTicTacToe) na notação compacta."""
+    # `_value_` é um atributo comum (mais barato que `.value` ou hash do Enum);
+    # o espaço de Player.EMPTY vira '.' com translate.
+    cells = ''.join([cell._value_ for row in _chain(game.boards) for cell in row])
+    main = ''.join([cell._value_ for row in game.main_board for cell in row])
+    return (f"{cells.translate(_EMPTY_TO_CHAR)} {main.translate(_EMPTY_TO_CHAR)} "
+            f"{game.current_player._value_} {game.small_wins_x}/{game.small_wins_o}")
+
+
+def validate_position(text):
+    """Valida a notação sem montar a partida.
+
+    Retorna (células, tabuleiro principal, vez, vitórias X, vitórias O, estado)
+    e levanta NotationError se o texto estiver malformado ou inconsistente
+    (tabuleiro principal ou contadores que não batem com as células, vez
+    incompatível com o número de peças) ou inalcançável (peças num tabuleiro
+    depois de decidido, linhas do principal que não vêm da mesma jogada,
+    número de peças que não bate com quem fez a última jogada). É o caminho
+    rápido para quem só precisa conferir ou reescrever posições em grande
+    quantidade.
+    """
+    parts = text.split()
+    if len(parts) != 4:
+        raise NotationError("esperados 4 campos: células, tabuleiro principal, vez e vitórias")
+    cells, main, side, counters = parts
+    if len(cells) != 81 or cells.translate(_CELL_CHARS_TABLE):
+        raise NotationError("células devem ter 81 caracteres entre 'X', 'O' e '.'")
+    if side != 'X' and side != 'O':
+        raise NotationError("vez deve ser 'X' ou 'O'")
+
+    status = _BOARD_STATUS or _board_tables()[0]
+    statuses = [status[cells[i:i + 9]] for i in _BOARD_OFFSETS]
+    if None in statuses:
+        raise NotationError(f"tabuleiro {statuses.index(None)} recebeu peças depois de decidido")
+    derived_main = ''.join(statuses)
+    if main != derived_main:
+        raise NotationError(f"tabuleiro principal {main!r} não confere com as células ({derived_main!r})")
+
+    small_wins_x = main.count('X')
+    small_wins_o = main.count('O')
+    if counters != f"{small_wins_x}/{small_wins_o}":
+        raise NotationError(f"vitórias pequenas {counters!r} não conferem ({small_wins_x}/{small_wins_o})")
+
+    x_count = cells.count('X')
+    o_count = cells.count('O')
+    if x_count - o_count not in (0, 1):
+        raise NotationError("número de X e O impossível (X sempre começa)")
+
+    # A partida acaba na primeira linha do principal: várias só se a mesma
+    # jogada fechou todas (mesmo dono, com um tabuleiro em comum)
+    lines = [line for line in _LINES if main[line[0]] == main[line[1]] == main[line[2]] != EMPTY_CHAR]
+    if len(lines) > 1 and (len({main[line[0]] for line in lines}) > 1 or
+                           not set(lines[0]).intersection(*lines[1:])):
+        raise NotationError("linhas do tabuleiro principal que não podem vir da mesma jogada")
+    # Uma linha de X ou de O foi fechada por uma jogada desse lado
+    if lines and main[lines[0][0]] != TIE_CHAR:
+        last_mover = 'X' if x_count > o_count else 'O'
+        if main[lines[0][0]] != last_mover:
+            raise NotationError(f"linha de {main[lines[0][0]]!r} no tabuleiro principal, "
+                                f"mas a última jogada foi de {last_mover!r}")
+
+    game_state = _main_state(main, small_wins_x, small_wins_o)
+    if game_state == GameState.PLAYING:
+        expected = 'X' if x_count == o_count else 'O'
+        if side != expected:
+            raise NotationError(f"vez de {expected!r} pelo número de peças, não de {side!r}")
+    return cells, main, side, small_wins_x, small_wins_o, game_state
+
+
+def parse_position(text):
+    """Lê a notação compacta e retorna um GameCore validado (ver `validate_position`)."""
+    cells, main, side, small_wins_x, small_wins_o, game_state = validate_position(text)
+    rows = _BOARD_ROWS or _board_tables()[1]
+    main_rows = _MAIN_ROWS
+    return GameCore.from_fields(
+        [list(map(list, rows[cells[i:i + 9]])) for i in _BOARD_OFFSETS],
+        [list(main_rows[main[0:3]]), list(main_rows[main[3:6]]), list(main_rows[main[6:9]])],
+        Player.X if side == 'X' else Player.O,
+        game_state,
+        small_wins_x,
+        small_wins_o,
+    )
+
+
+def _main_state(main, small_wins_x, small_wins_o):
+    """Deriva o estado da partida com as mesmas regras de `make_move`.
+
+    Como em `check_winner`, uma linha de três empates também conta como
+    "vencedor", e `make_move` a trata como vitória de O.
+    """
+    for a, b, c in _LINES:
+        if main[a] == main[b] == main[c] and main[a] != EMPTY_CHAR:
+            return GameState.X_WINS if main[a] == 'X' else GameState.O_WINS
+    if EMPTY_CHAR not in main:
+        if small_wins_x > small_wins_o:
+            return GameState.X_WINS
+        if small_wins_o > small_wins_x:
+            return GameState.O_WINS
+        return GameState.TIE
+    return GameState.PLAYING
+
+
+def is_notation(text):
+    """Verificação barata para distinguir a notação de outros formatos (ex.: JSON)."""
+    return not text.lstrip().startswith('{')
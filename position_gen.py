@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""Gerador de posições aleatórias legais, em streaming.
+
+Joga partidas aleatórias (jogadas uniformes entre as válidas) numa
+representação plana, sem GameCore: células em um bytearray de 81 bytes,
+tabuleiro principal em outro de 9 e as jogadas disponíveis numa lista.
+`_play_move` segue exatamente as regras de `GameCore.make_move` (inclusive a
+linha de três empates no tabuleiro principal, que conta como vitória de O, e
+o desempate por vitórias pequenas), então toda posição gerada é alcançável
+no jogo; `--check` confere isso jogando as mesmas partidas com GameCore.
+
+Cada posição de uma partida com número de jogadas entre `--min-ply` e
+`--max-ply` que passa pelos filtros é escrita em notação compacta (ver
+notation.py), uma por linha, o formato de entrada de analyze.py. Com
+`--per-game K` só K posições (sorteadas) de cada partida são usadas.
+
+Opções que nenhuma partida satisfaz são recusadas logo; filtros que quase
+nunca se cumprem param com erro depois de MAX_EMPTY_GAMES partidas seguidas
+sem posição aceita.
+
+A saída depende só da semente e das opções: as partidas são divididas em
+tarefas numeradas, cada uma com a sua semente, e os resultados são escritos
+na ordem das tarefas, com qualquer número de processos.
+
+Uso:
+    python position_gen.py -n 100000 --min-ply 10 --max-ply 50 -o posicoes.txt
+    python position_gen.py -n 1000 --undecided --min-open-boards 5 --seed 7
+    python position_gen.py -n 200 --undecided --tactic forced | python analyze.py -
+    python position_gen.py --check 500
+"""
+import argparse
+import collections
+import concurrent.futures
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from game_core import GameState, GameCore
+import notation
+
+GAMES_PER_TASK = 200
+# Com --tactic forced cada posição passa pela busca de ameaças (~2 ms):
+# tarefas menores para a saída começar logo e não sobrar trabalho no fim
+FORCED_GAMES_PER_TASK = 4
+TACTICS = ("immediate", "forced")
+# Primeira posição com uma tática possível: X precisa de 8 peças (dois
+# tabuleiros ganhos e duas no terceiro) e joga com 8 na jogada 16
+MIN_TACTIC_PLY = 16
+# Partidas seguidas sem nenhuma posição aceita antes de desistir: sem limite,
+# filtros que (quase) nunca se cumprem deixariam o gerador parado para sempre
+MAX_EMPTY_GAMES = 5000
+
+_X, _O = ord('X'), ord('O')
+_EMPTY, _TIE = ord(notation.EMPTY_CHAR), ord(notation.TIE_CHAR)
+_OPPONENT = {_X: _O, _O: _X}
+_OUTCOME = {_X: GameState.X_WINS, _O: GameState.O_WINS}
+
+_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+# Para cada casa de um 3x3, os pares de casas que completam uma linha com ela
+_LINE_PARTNERS = tuple(tuple(tuple(i for i in line if i != cell) for line in _LINES if cell in line)
+                       for cell in range(9))
+
+
+@dataclass(frozen=True)
+class GeneratorOptions:
+    """Intervalo de jogadas e filtros das posições geradas."""
+    min_ply: int = 0
+    max_ply: int = 81
+    undecided: bool = False          # Só partidas em andamento
+    min_open_boards: int = 0         # Tabuleiros pequenos ainda em jogo
+    tactic: Optional[str] = None     # "immediate" ou "forced" (ver TACTICS)
+    per_game: Optional[int] = None   # Posições por partida (None = todas)
+
+    def __post_init__(self):
+        """Recusa (ValueError) combinações que nenhuma partida satisfaz."""
+        if not 0 <= self.min_ply <= self.max_ply <= 81:
+            raise ValueError(f"intervalo de jogadas inválido: {self.min_ply}..{self.max_ply} "
+                             "(deve ficar em 0..81)")
+        if not 0 <= self.min_open_boards <= 9:
+            raise ValueError("mínimo de tabuleiros em jogo deve ficar entre 0 e 9")
+        if self.tactic is not None:
+            if self.tactic not in TACTICS:
+                raise ValueError(f"tática desconhecida: {self.tactic!r}")
+            if self.max_ply < MIN_TACTIC_PLY:
+                raise ValueError(f"nenhuma tática é possível antes da jogada {MIN_TACTIC_PLY}")
+        if self.per_game is not None and self.per_game < 1:
+            raise ValueError("posições por partida deve ser pelo menos 1")
+
+    @property
+    def games_per_task(self):
+        return FORCED_GAMES_PER_TASK if self.tactic == "forced" else GAMES_PER_TASK
+
+
+# --- Regras na representação plana ---
+def _play_move(cells, main, filled, wins, cell, side):
+    """Joga `side` em `cell` como `GameCore.make_move`; retorna o novo GameState.
+
+    Como em make_move, só o tabuleiro jogado pode ser decidido, e só as
+    linhas do principal que passam por ele podem se completar.
+    """
+    board, local = divmod(cell, 9)
+    offset = board * 9
+    cells[cell] = side
+    filled[board] += 1
+    for a, b in _LINE_PARTNERS[local]:
+        if cells[offset + a] == side and cells[offset + b] == side:
+            main[board] = side
+            wins[side] += 1
+            break
+    else:
+        if filled[board] < 9:
+            return GameState.PLAYING
+        main[board] = _TIE
+
+    value = main[board]
+    for a, b in _LINE_PARTNERS[board]:
+        if main[a] == value and main[b] == value:
+            # Linha de três empates: check_winner devolve TIE e make_move declara O
+            return GameState.X_WINS if value == _X else GameState.O_WINS
+    if _EMPTY not in main:
+        if wins[_X] > wins[_O]:
+            return GameState.X_WINS
+        if wins[_O] > wins[_X]:
+            return GameState.O_WINS
+        return GameState.TIE
+    return GameState.PLAYING
+
+
+def _undo_move(cells, main, filled, wins, cell):
+    """Desfaz `_play_move` (a partida estava em andamento antes dela)."""
+    board = cell // 9
+    if main[board] in _OUTCOME:
+        wins[main[board]] -= 1
+    main[board] = _EMPTY
+    filled[board] -= 1
+    cells[cell] = _EMPTY
+
+
+def _wins_now(cells, main, filled, wins, side):
+    """True se `side` tem uma jogada que encerra a partida com a sua vitória.
+
+    A partida só acaba num tabuleiro que completa uma linha do principal (as
+    outras duas casas iguais e decididas) ou no último tabuleiro em jogo;
+    só as células desses tabuleiros são testadas com `_play_move`.
+    """
+    goal = _OUTCOME[side]
+    last_board = main.count(_EMPTY) == 1
+    for board in range(9):
+        if main[board] != _EMPTY:
+            continue
+        if not last_board and not any(main[a] == main[b] != _EMPTY for a, b in _LINE_PARTNERS[board]):
+            continue
+        for cell in range(board * 9, board * 9 + 9):
+            if cells[cell] == _EMPTY:
+                state = _play_move(cells, main, filled, wins, cell, side)
+                _undo_move(cells, main, filled, wins, cell)
+                if state == goal:
+                    return True
+    return False
+
+
+def _has_forced_win(text):
+    """True se a busca de ameaças da CPU difícil acha uma vitória forçada."""
+    from cpu_player import CPUPlayer  # Só para --tactic forced
+    game = notation.parse_position(text)
+    cpu = CPUPlayer("hard", player=game.current_player)
+    return cpu._threat_space_search(cpu._copy_game_state(game)) is not None
+
+
+def _format(cells, main, side, wins):
+    return f"{cells.decode()} {main.decode()} {chr(side)} {wins[_X]}/{wins[_O]}"
+
+
+# --- Partidas ---
+def random_game(rng, options, moves=None):
+    """Joga uma partida aleatória e retorna as posições que passam nos filtros.
+
+    Se `moves` for uma lista, recebe as jogadas (índice de célula 0..80).
+    """
+    cells = bytearray(b"." * 81)
+    main = bytearray(b"." * 9)
+    filled = [0] * 9
+    wins = {_X: 0, _O: 0}
+    available = list(range(81))
+    side = _X
+    state = GameState.PLAYING
+    positions = []
+    randrange = rng.randrange
+
+    # Táticas só fazem sentido com a partida em andamento
+    playing_only = options.undecided or options.tactic is not None
+    for ply in range(min(options.max_ply, 81) + 1):
+        if (ply >= options.min_ply and (state == GameState.PLAYING or not playing_only) and
+                main.count(_EMPTY) >= options.min_open_boards and
+                (options.tactic != "immediate" or _wins_now(cells, main, filled, wins, side))):
+            positions.append(_format(cells, main, side, wins))
+        if state != GameState.PLAYING:
+            break
+
+        index = randrange(len(available))
+        cell = available[index]
+        available[index] = available[-1]
+        available.pop()
+        if moves is not None:
+            moves.append(cell)
+
+        state = _play_move(cells, main, filled, wins, cell, side)
+        board = cell // 9
+        if main[board] != _EMPTY:
+            available = [c for c in available if c // 9 != board]
+        if state == GameState.PLAYING:
+            side = _OPPONENT[side]
+
+    if options.tactic == "forced":
+        positions = [text for text in positions if _has_forced_win(text)]
+    if options.per_game is not None and len(positions) > options.per_game:
+        chosen = sorted(rng.sample(range(len(positions)), options.per_game))
+        positions = [positions[i] for i in chosen]
+    return positions
+
+
+def generate_task(seed, task, options):
+    """Posições das partidas da tarefa `task` (semente própria)."""
+    rng = random.Random(f"{seed}/{task}")
+    positions = []
+    for _ in range(options.games_per_task):
+        positions.extend(random_game(rng, options))
+    return positions
+
+
+class _EmptyTaskLimit:
+    """Conta tarefas seguidas sem posições; ValueError depois de MAX_EMPTY_GAMES partidas."""
+    def __init__(self, options):
+        self.options = options
+        self.limit = max(1, MAX_EMPTY_GAMES // options.games_per_task)
+        self.empty = 0
+
+    def update(self, positions):
+        self.empty = 0 if positions else self.empty + 1
+        if self.empty >= self.limit:
+            raise ValueError(f"nenhuma posição em {self.empty * self.options.games_per_task} "
+                             "partidas seguidas: os filtros são restritivos demais")
+
+
+def generate_positions(count, seed=0, options=GeneratorOptions()):
+    """Gera `count` posições no processo atual (mesma sequência da linha de comando)."""
+    produced = 0
+    task = 0
+    empty_tasks = _EmptyTaskLimit(options)
+    while produced < count:
+        positions = generate_task(seed, task, options)
+        empty_tasks.update(positions)
+        for text in positions[:count - produced]:
+            yield text
+            produced += 1
+        task += 1
+
+
+def run_generator(output, count, seed, options, workers, window):
+    """Escreve `count` posições, com `window` tarefas em andamento nos processos.
+
+    Como em analyze.py, os futuros ficam em ordem e só o primeiro é
+    esperado, então a saída sai na ordem das tarefas e a memória fica
+    limitada à janela. ValueError se os filtros não aceitarem posição
+    alguma por MAX_EMPTY_GAMES partidas seguidas.
+    """
+    written = 0
+    empty_tasks = _EmptyTaskLimit(options)
+    tasks = iter(range(sys.maxsize))
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        while written < count:
+            while len(pending) < window:
+                pending.append(executor.submit(generate_task, seed, next(tasks), options))
+            positions = pending.popleft().result()
+            empty_tasks.update(positions)
+            positions = positions[:count - written]
+            if positions:
+                output.write("\n".join(positions) + "\n")
+            written += len(positions)
+        for future in pending:
+            future.cancel()
+    return written
+
+
+# --- Conferência com GameCore ---
+def check_against_game_core(games, seed=0):
+    """Joga as mesmas partidas com GameCore.make_move e compara cada posição."""
+    rng = random.Random(f"{seed}/check")
+    options = GeneratorOptions()
+    for _ in range(games):
+        moves = []
+        positions = random_game(rng, options, moves)
+        game = GameCore()
+        expected = [notation.format_position(game)]
+        for cell in moves:
+            board, local = divmod(cell, 9)
+            if not game.make_move(*divmod(board, 3), *divmod(local, 3)):
+                raise AssertionError(f"jogada {cell} recusada por make_move depois de {expected[-1]}")
+            expected.append(notation.format_position(game))
+        if positions != expected:
+            raise AssertionError(f"posições divergentes na partida {moves}")
+        notation.parse_position(positions[-1])  # A última inclui o resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de posições aleatórias legais")
+    parser.add_argument("-n", "--count", type=int, default=10000, help="número de posições")
+    parser.add_argument("-o", "--output", default="-", help="arquivo de saída (padrão: stdout)")
+    parser.add_argument("--min-ply", type=int, default=0, help="menor número de jogadas feitas")
+    parser.add_argument("--max-ply", type=int, default=81, help="maior número de jogadas feitas")
+    parser.add_argument("--undecided", action="store_true",
+                        help="só partidas em andamento (tabuleiro principal não decidido)")
+    parser.add_argument("--min-open-boards", type=int, default=0,
+                        help="mínimo de tabuleiros pequenos ainda em jogo")
+    parser.add_argument("--tactic", choices=TACTICS,
+                        help="exige uma tática para quem joga: immediate (vence o jogo nesta jogada) "
+                             "ou forced (vitória forçada pela busca de ameaças; bem mais lento)")
+    parser.add_argument("--per-game", type=int, default=None,
+                        help="no máximo K posições sorteadas por partida (padrão: todas)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--window", type=int, default=None,
+                        help="tarefas em andamento ao mesmo tempo (padrão: 4 por processo)")
+    parser.add_argument("--check", type=int, metavar="PARTIDAS",
+                        help="só confere PARTIDAS partidas contra GameCore.make_move e sai")
+    args = parser.parse_args()
+
+    if args.check:
+        started = time.perf_counter()
+        check_against_game_core(args.check, args.seed)
+        print(f"{args.check} partidas conferem com GameCore.make_move "
+              f"({time.perf_counter() - started:.1f}s).", file=sys.stderr)
+        return
+
+    try:
+        options = GeneratorOptions(args.min_ply, args.max_ply, args.undecided, args.min_open_boards,
+                                   args.tactic, args.per_game)
+    except ValueError as e:
+        parser.error(str(e))
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    started = time.perf_counter()
+    try:
+        written = run_generator(output, args.count, args.seed, options, args.workers,
+                                args.window or args.workers * 4)
+    except ValueError as e:
+        sys.exit(f"Erro: {e}")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"{written} posições em {elapsed:.2f}s ({written / max(elapsed, 1e-9):.0f}/s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
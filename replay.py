@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Partidas gravadas e replay com busca rápida por snapshots.
+
+O jogo grava cada partida terminada em GAMES_LOG_FILE, uma por linha:
+
+    {"start": null, "moves": [[1, 1, 1, 1], ...], "result": "x_wins",
+     "mode": "human_vs_cpu", "difficulty": "hard"}
+
+`start` é a posição inicial em notação compacta (quando a partida começou
+de uma posição colada) ou null. `GameReplay` aplica as jogadas com
+`Position.play` (sem `make_move`, então sem estatísticas) e guarda uma
+posição a cada `snapshot_interval` jogadas; ir para qualquer jogada é
+restaurar o snapshot anterior e aplicar no máximo `snapshot_interval - 1`
+jogadas.
+"""
+import json
+import time
+
+from game_history import Position
+import notation
+
+GAMES_LOG_FILE = "ultimate_tictactoe_games.jsonl"
+SNAPSHOT_INTERVAL = 10
+
+
+def game_record(history, game_mode, difficulty, game_state):
+    """Monta o registro de uma partida a partir do seu histórico."""
+    root = history.root.position
+    start = None if root == Position.initial() else notation.format_position(root.to_game())
+    return {
+        'start': start,
+        'moves': [list(move) for move in history.moves()],
+        'result': game_state.value,
+        'mode': game_mode.value,
+        'difficulty': difficulty,
+    }
+
+
+def append_game(record, path=GAMES_LOG_FILE):
+    """Acrescenta uma partida ao arquivo de partidas."""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_game(path, index=-1):
+    """Lê a partida `index` (negativo conta do fim) de um arquivo de partidas.
+
+    Retorna (registro, total de partidas no arquivo). Só a linha escolhida é
+    convertida de JSON, então arquivos longos são lidos rapidamente.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"nenhuma partida em {path}")
+    if not -len(lines) <= index < len(lines):
+        raise ValueError(f"partida {index} fora do intervalo (o arquivo tem {len(lines)})")
+    return json.loads(lines[index]), len(lines)
+
+
+class GameReplay:
+    """Jogadas de uma partida com snapshots periódicos para `seek` rápido."""
+    def __init__(self, moves, start=None, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.moves = [tuple(move) for move in moves]
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = [start or Position.initial()]
+
+        position = self.snapshots[0]
+        for ply, move in enumerate(self.moves, 1):
+            try:
+                position = position.play(move)
+            except ValueError as e:
+                raise ValueError(f"jogada {ply} inválida: {e}") from e
+            if ply % snapshot_interval == 0:
+                self.snapshots.append(position)
+
+    @classmethod
+    def from_record(cls, record, snapshot_interval=SNAPSHOT_INTERVAL):
+        start = record.get('start')
+        if start:
+            start = Position.from_game(notation.parse_position(start))
+        return cls(record['moves'], start, snapshot_interval)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def seek(self, ply):
+        """Posição depois de `ply` jogadas (limitado a 0..len)."""
+        ply = max(0, min(ply, len(self.moves)))
+        snapshot_index = ply // self.snapshot_interval
+        position = self.snapshots[snapshot_index]
+        for move in self.moves[snapshot_index * self.snapshot_interval:ply]:
+            position = position.play(move)
+        return position
+
+
+def load_replay(path, index=-1, snapshot_interval=SNAPSHOT_INTERVAL):
+    """Carrega uma partida para replay e imprime o relatório de tempo de carga."""
+    started = time.perf_counter()
+    record, total = load_game(path, index)
+    read = time.perf_counter()
+    replay = GameReplay.from_record(record, snapshot_interval)
+    built = time.perf_counter()
+    print(f"Replay: {path} ({total} partidas) lido em {(read - started) * 1000:.1f} ms; "
+          f"{len(replay)} jogadas, {len(replay.snapshots)} snapshots (a cada {snapshot_interval}) "
+          f"em {(built - read) * 1000:.1f} ms")
+    return replay
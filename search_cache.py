@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Cache em disco de resultados da busca, compartilhado entre execuções.
+
+Arquivo de registros de tamanho fixo (hash da posição -> profundidade,
+pontuação, melhor jogada), só com acréscimos:
+
+    cabeçalho  16 bytes (MAGIC)
+    registros  24 bytes cada: hash de 64 bits, pontuação (double),
+               profundidade, jogada (tabuleiro * 9 + célula; 255 = nenhuma)
+
+Ao abrir, o arquivo é mapeado em memória (mmap) e indexado; consultas leem
+direto do mapa e percebem registros acrescentados por outros processos
+(conferindo o arquivo no máximo a cada REFRESH_INTERVAL segundos). As
+gravações vão para uma fila e uma thread em segundo plano as acrescenta em
+lote, com trava exclusiva (fcntl, quando disponível) num arquivo ".lock" à
+parte. Quando o arquivo passa de `max_bytes`, quem estiver gravando o
+compacta (mantém o registro mais recente de cada posição e, se preciso, só os
+mais recentes) e troca o arquivo com `os.replace`; os outros processos
+notam a troca pelo inode e reabrem.
+"""
+import atexit
+import hashlib
+import mmap
+import multiprocessing.util
+import os
+import queue
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+MAGIC = b"UTTT-CACHE-v1\0\0\0"
+HEADER_SIZE = len(MAGIC)
+RECORD = struct.Struct("<QdBB6x")
+RECORD_SIZE = RECORD.size
+NO_MOVE = 255
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+# Depois de compactar, o arquivo fica com no máximo esta fração de `max_bytes`
+COMPACT_RATIO = 0.5
+# Intervalo mínimo, em segundos, entre conferências do arquivo (os.stat) nas
+# consultas: registros de outros processos aparecem com esse atraso
+REFRESH_INTERVAL = 0.25
+# Máximo de gravações deste processo guardadas à parte até aparecerem no mapa
+RECENT_LIMIT = 65536
+
+_KEY_SCAN = struct.Struct("<Q16x")
+
+
+def position_key(text):
+    """Hash de 64 bits do texto que identifica a busca (posição + parâmetros)."""
+    return int.from_bytes(hashlib.blake2b(text.encode('ascii'), digest_size=8).digest(), 'little')
+
+
+def encode_move(move):
+    if move is None:
+        return NO_MOVE
+    main_row, main_col, row, col = move
+    return (main_row * 3 + main_col) * 9 + row * 3 + col
+
+
+def decode_move(code):
+    if code == NO_MOVE:
+        return None
+    board_index, cell_index = divmod(code, 9)
+    return (*divmod(board_index, 3), *divmod(cell_index, 3))
+
+
+class SearchCache:
+    """Cache de busca em um arquivo, seguro para vários processos no mesmo host."""
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max(max_bytes, HEADER_SIZE + RECORD_SIZE * 16)
+        self._lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._write_fd = None
+        self._map = None
+        self._inode = None
+        self._mapped_size = 0
+        self._index = {}   # hash -> deslocamento do registro no mapa
+        self._recent = {}  # Gravados por este processo e ainda não vistos no mapa
+        self._next_refresh = 0.0
+
+        with self._locked():
+            self._open_write_fd()
+        self._remap()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        # Processos filhos do multiprocessing saem sem rodar o atexit, mas
+        # rodam os finalizadores: os dois garantem que a fila seja gravada
+        atexit.register(self.close)
+        multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+
+    # --- Consulta ---
+    def get(self, text):
+        """Retorna (profundidade, pontuação, jogada) ou None."""
+        key = position_key(text)
+        if key in self._recent:
+            return self._recent[key]
+        now = time.monotonic()
+        if now >= self._next_refresh:
+            self._next_refresh = now + REFRESH_INTERVAL
+            self._refresh()
+        offset = self._index.get(key)
+        if offset is None:
+            return None
+        _, score, depth, move = RECORD.unpack_from(self._map, offset)
+        return depth, score, decode_move(move)
+
+    def put(self, text, depth, score, move):
+        """Agenda a gravação (assíncrona) de um resultado."""
+        key = position_key(text)
+        self._recent.pop(key, None)
+        self._recent[key] = (depth, score, move)
+        if len(self._recent) > RECENT_LIMIT:
+            # O mais antigo já deve estar no arquivo; no pior caso vira uma falta
+            del self._recent[next(iter(self._recent))]
+        self._queue.put(RECORD.pack(key, score, depth, encode_move(move)))
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index) + len(self._recent)
+
+    def flush(self):
+        """Espera a thread gravar tudo o que está na fila."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        atexit.unregister(self.close)
+        if self._map is not None:
+            self._map.close()
+        os.close(self._write_fd)
+        os.close(self._lock_fd)
+
+    # --- Mapa em memória ---
+    def _refresh(self):
+        """Incorpora registros novos ou reabre o arquivo se ele foi compactado."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._mapped_size:
+            # Arquivo compactado: as chaves que ele descartou nunca mais
+            # apareceriam no mapa para sair de `_recent`
+            self._index = {}
+            self._recent.clear()
+            self._mapped_size = 0
+            self._remap()
+        elif stat.st_size >= self._mapped_size + RECORD_SIZE:
+            self._remap()
+
+    def _remap(self):
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            if size < HEADER_SIZE:
+                return
+            new_map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        if new_map[:HEADER_SIZE] != MAGIC:
+            new_map.close()
+            raise ValueError(f"{self.path} não é um cache de busca")
+        if self._map is not None:
+            self._map.close()
+        self._map = new_map
+        self._inode = stat.st_ino
+
+        # Registros incompletos no fim (gravação interrompida) são ignorados
+        start = max(self._mapped_size, HEADER_SIZE)
+        end = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_SIZE * RECORD_SIZE
+        index, recent = self._index, self._recent
+        for offset, (key,) in zip(range(start, end, RECORD_SIZE),
+                                  _KEY_SCAN.iter_unpack(new_map[start:end])):
+            index[key] = offset
+            recent.pop(key, None)
+        self._mapped_size = end
+
+    # --- Gravação ---
+    def _locked(self):
+        return _FileLock(self._lock_fd)
+
+    def _open_write_fd(self):
+        """Abre (ou reabre após compactação) o arquivo para acréscimos; chamar com a trava."""
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+        self._write_fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self._write_fd).st_size == 0:
+            os.write(self._write_fd, MAGIC)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = batch[-1] is None
+            records = b"".join(record for record in batch if record is not None)
+            try:
+                if records:
+                    self._append(records)
+            except OSError as e:
+                print(f"Aviso: Não foi possível gravar no cache de busca. Erro: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if done:
+                break
+
+    def _append(self, records):
+        with self._locked():
+            # Outro processo pode ter compactado (trocado) o arquivo
+            if os.fstat(self._write_fd).st_ino != os.stat(self.path).st_ino:
+                self._open_write_fd()
+            os.write(self._write_fd, records)
+            if os.fstat(self._write_fd).st_size > self.max_bytes:
+                self._compact()
+
+    def _compact(self):
+        """Reescreve o arquivo sem duplicatas e dentro do limite; chamar com a trava."""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        end = HEADER_SIZE + (len(data) - HEADER_SIZE) // RECORD_SIZE * RECORD_SIZE
+        latest = {}
+        for offset in range(HEADER_SIZE, end, RECORD_SIZE):
+            key = _KEY_SCAN.unpack_from(data, offset)[0]
+            latest.pop(key, None)  # Reinserir mantém a ordem do mais recente
+            latest[key] = offset
+        keep = int(self.max_bytes * COMPACT_RATIO - HEADER_SIZE) // RECORD_SIZE
+        offsets = list(latest.values())[-keep:]
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(b"".join(data[offset:offset + RECORD_SIZE] for offset in offsets))
+        os.replace(temp_path, self.path)
+        self._open_write_fd()
+
+
+class _FileLock:
+    """Trava exclusiva via fcntl.flock (sem efeito onde fcntl não existe)."""
+    def __init__(self, fd):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+_process_caches = {}
+
+
+def open_search_cache(path, max_bytes=DEFAULT_MAX_BYTES):
+    """Abre o cache uma vez por processo; retorna None (com aviso) se não for possível.
+
+    A chave inclui o pid: um processo filho criado por fork não herda a
+    thread de gravação, então abre o seu próprio.
+    """
+    key = (path, os.getpid())
+    if key not in _process_caches:
+        try:
+            _process_caches[key] = SearchCache(path, max_bytes)
+        except (OSError, ValueError) as e:
+            print(f"Aviso: Não foi possível abrir o cache de busca. Continuando sem ele. Erro: {e}")
+            _process_caches[key] = None
+    return _process_caches[key]
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""Servidor asyncio para várias partidas simultâneas (sem pygame).
+
+Protocolo de linhas: cada requisição e cada resposta é um objeto JSON em uma
+linha. Comandos aceitos:
+
+    {"cmd": "new", "mode": "cpu", "difficulty": "hard", "time_limit": 2.0}
+    {"cmd": "new", "mode": "human"}          -> ocupa o assento X
+    {"cmd": "join", "game": "<id>"}          -> ocupa o assento O
+    {"cmd": "move", "game": "<id>", "move": [main_row, main_col, row, col]}
+    {"cmd": "state", "game": "<id>"}
+    {"cmd": "close", "game": "<id>"}
+
+As jogadas da CPU rodam em um pool de processos limitado. Quando o pool está
+saturado o servidor responde {"ok": false, "error": "busy"} em vez de
+enfileirar sem limite.
+
+Uso:
+    python server.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import random
+import time
+import uuid
+
+from game_core import Player, GameState, GameCore
+from cpu_player import CPUPlayer, SearchAborted
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TIME_LIMIT = 5.0  # Segundos por jogada da CPU
+MAX_LINE_LENGTH = 64 * 1024
+# Folga além do prazo antes de desistir de esperar o processo (a busca
+# confere o prazo a cada 256 nós)
+DEADLINE_GRACE = 0.25
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def compute_cpu_move(difficulty, game, deadline, seed):
+    """Executado nos processos do pool: calcula a jogada da CPU.
+
+    `deadline` é um instante de `time.time()`. Se ele passar, ainda na fila
+    ou durante a busca, retorna None e o processo fica livre na hora.
+    `seed` é a semente da partida para o sorteio dos níveis fácil e médio.
+    """
+    if time.time() >= deadline:
+        return None
+    cpu = CPUPlayer(difficulty, seed=seed)
+    cpu.abort_check = lambda: time.time() >= deadline
+    try:
+        return cpu.get_best_move(game)
+    except SearchAborted:
+        return None
+
+
+class ProtocolError(Exception):
+    """Requisição inválida enviada pelo cliente."""
+
+
+class GameSession:
+    """Estado de uma partida hospedada pelo servidor."""
+    def __init__(self, game_id, mode, difficulty="medium", time_limit=DEFAULT_TIME_LIMIT, seed=0):
+        self.game_id = game_id
+        self.mode = mode
+        self.difficulty = difficulty
+        self.time_limit = time_limit
+        self.seed = seed  # Sorteio da CPU: a mesma posição não tem sempre a mesma resposta
+        self.game = GameCore()
+        self.seats = {}  # Player -> writer da conexão
+        self.lock = asyncio.Lock()  # Serializa jogadas da mesma partida
+
+    def describe(self):
+        """Estado enviado ao cliente."""
+        state = self.game.to_dict()
+        state['game'] = self.game_id
+        state['mode'] = self.mode
+        if self.mode == "cpu":
+            state['difficulty'] = self.difficulty
+        return state
+
+
+class CPUPool:
+    """Pool de processos limitado com contagem de tarefas em andamento."""
+    def __init__(self, workers, queue_limit):
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        self.capacity = workers + queue_limit
+        self.in_flight = 0
+
+    def saturated(self):
+        return self.in_flight >= self.capacity
+
+    async def best_move(self, difficulty, game, time_limit, seed):
+        """Calcula a jogada no pool respeitando o limite de tempo.
+
+        Retorna None se o tempo estourar. O prazo vai para o processo, que
+        interrompe a busca sozinho; a vaga só é liberada quando ele termina
+        de fato, para que jogadas atrasadas continuem contando como carga.
+        """
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        future = self.executor.submit(compute_cpu_move, difficulty, game, time.time() + time_limit, seed)
+        # O callback roda na thread do executor: a contagem só muda no loop
+        future.add_done_callback(lambda _future: loop.call_soon_threadsafe(self._release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), time_limit + DEADLINE_GRACE)
+        except asyncio.TimeoutError:
+            return None
+
+    def _release(self):
+        self.in_flight -= 1
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class GameServer:
+    """Servidor de partidas com protocolo JSON por linha."""
+    def __init__(self, workers=None, queue_limit=None, max_time_limit=DEFAULT_TIME_LIMIT):
+        workers = workers or os.cpu_count() or 1
+        self.pool = CPUPool(workers, workers if queue_limit is None else queue_limit)
+        self.max_time_limit = max_time_limit
+        self.sessions = {}
+        self.moves_served = 0
+
+    # --- Conexões ---
+    async def handle_connection(self, reader, writer):
+        """Atende um cliente até ele desconectar."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ProtocolError("requisição deve ser um objeto JSON")
+                    response = await self.dispatch(request, writer)
+                except (ProtocolError, ValueError, TypeError) as e:
+                    response = {'ok': False, 'error': str(e)}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                await self.send(writer, response)
+        finally:
+            self._drop_connection(writer)
+            writer.close()
+
+    async def send(self, writer, message):
+        """Envia uma mensagem; `drain` aplica contrapressão do lado do socket."""
+        if writer.is_closing():
+            return
+        writer.write(json.dumps(message).encode() + b"\n")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def _drop_connection(self, writer):
+        """Libera assentos e encerra partidas que ficaram sem jogadores."""
+        for game_id, session in list(self.sessions.items()):
+            for player, seat_writer in list(session.seats.items()):
+                if seat_writer is writer:
+                    del session.seats[player]
+            if not session.seats:
+                del self.sessions[game_id]
+
+    # --- Comandos ---
+    async def dispatch(self, request, writer):
+        command = request.get('cmd')
+        if command == 'new':
+            return self.cmd_new(request, writer)
+        if command == 'join':
+            return self.cmd_join(request, writer)
+        if command == 'move':
+            return await self.cmd_move(request, writer)
+        if command == 'state':
+            return {'ok': True, 'state': self._session(request).describe()}
+        if command == 'close':
+            session = self._session(request)
+            # Como em move: só quem ocupa um assento pode encerrar a partida
+            if not any(seat_writer is writer for seat_writer in session.seats.values()):
+                raise ProtocolError("você não participa desta partida")
+            del self.sessions[session.game_id]
+            return {'ok': True}
+        raise ProtocolError(f"comando desconhecido: {command!r}")
+
+    def _session(self, request):
+        session = self.sessions.get(request.get('game'))
+        if session is None:
+            raise ProtocolError("partida não encontrada")
+        return session
+
+    def cmd_new(self, request, writer):
+        mode = request.get('mode', 'cpu')
+        if mode not in ('cpu', 'human'):
+            raise ProtocolError("mode deve ser 'cpu' ou 'human'")
+        difficulty = request.get('difficulty', 'medium')
+        if difficulty not in DIFFICULTIES:
+            raise ProtocolError(f"dificuldade inválida: {difficulty!r}")
+        time_limit = float(request.get('time_limit', self.max_time_limit))
+        time_limit = max(0.01, min(time_limit, self.max_time_limit))
+
+        # Semente nova por partida, como o jogo faz a cada partida nova
+        session = GameSession(uuid.uuid4().hex[:12], mode, difficulty, time_limit,
+                              random.randrange(2 ** 32))
+        session.seats[Player.X] = writer
+        self.sessions[session.game_id] = session
+        return {'ok': True, 'seat': Player.X.value, 'state': session.describe()}
+
+    def cmd_join(self, request, writer):
+        session = self._session(request)
+        if session.mode != 'human':
+            raise ProtocolError("só é possível entrar em partidas humano vs humano")
+        if Player.O in session.seats:
+            raise ProtocolError("partida já está completa")
+        session.seats[Player.O] = writer
+        return {'ok': True, 'seat': Player.O.value, 'state': session.describe()}
+
+    async def cmd_move(self, request, writer):
+        session = self._session(request)
+        move = request.get('move')
+        if (not isinstance(move, list) or len(move) != 4 or
+                not all(isinstance(value, int) for value in move)):
+            raise ProtocolError("move deve ser [main_row, main_col, row, col]")
+
+        async with session.lock:
+            game = session.game
+            if session.seats.get(game.current_player) is not writer:
+                raise ProtocolError("não é a sua vez")
+            if session.mode == 'cpu' and session.game.game_state == GameState.PLAYING:
+                # Contrapressão: recusa antes de alterar o estado da partida
+                if self.pool.saturated():
+                    return {'ok': False, 'error': 'busy'}
+            if not game.is_valid_move(*move):
+                raise ProtocolError("jogada inválida")
+            game.make_move(*move)
+            self.moves_served += 1
+
+            response = {'ok': True}
+            if session.mode == 'cpu' and game.game_state == GameState.PLAYING:
+                cpu_move = await self.pool.best_move(session.difficulty, game, session.time_limit,
+                                                     session.seed)
+                if cpu_move is None:
+                    # Tempo estourado: jogada sorteada, sem busca, para não
+                    # travar o loop (até o nível fácil é uma busca)
+                    response['timeout'] = True
+                    cpu_move = random.choice(game.get_valid_moves())
+                game.make_move(*cpu_move)
+                self.moves_served += 1
+                response['cpu_move'] = list(cpu_move)
+            elif session.mode == 'human':
+                opponent = session.seats.get(game.current_player)
+                if opponent is not None and opponent is not writer:
+                    await self.send(opponent, {'event': 'move', 'move': move,
+                                               'state': session.describe()})
+
+            response['state'] = session.describe()
+            return response
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port,
+                                            limit=MAX_LINE_LENGTH)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Servidor ouvindo em {addresses}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de partidas do Ultimate Tic-Tac-Toe")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos para jogadas da CPU (padrão: número de CPUs)")
+    parser.add_argument("--queue-limit", type=int, default=None,
+                        help="jogadas extras aceitas na fila antes de responder 'busy'")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="tempo máximo por jogada da CPU, em segundos")
+    args = parser.parse_args()
+
+    server = GameServer(args.workers, args.queue_limit, args.time_limit)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Ajuste dos pesos da avaliação da CPU por regressão logística.
+
+Subcomandos:
+
+    selfplay  Joga partidas CPU vs CPU e grava registros de treino, um por
+              posição: {"position": "<notação compacta>", "outcome": 1.0}
+              com o resultado final do ponto de vista de X (1 vitória de X,
+              0 vitória de O, 0.5 empate).
+    fit       Lê os registros em blocos, extrai as características da
+              avaliação de cada bloco inteiro com NumPy e ajusta os pesos
+              por regressão logística (Newton), gravando EVAL_WEIGHTS_FILE,
+              que o CPUPlayer carrega ao iniciar.
+
+Uso:
+    python tuning.py selfplay --games 20000 -o registros.jsonl
+    python tuning.py fit registros.jsonl -o eval_weights.json
+
+Requer NumPy (pip install numpy); o jogo em si não depende dele.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import numpy as np
+
+from game_core import Player, GameState, GameCore
+from cpu_player import (CPUPlayer, BOARD_GROUPS, DEFAULT_EVAL_WEIGHTS, EVAL_WEIGHTS_FILE,
+                        FEATURE_GROUPS, extract_features, weights_to_vector)
+import notation
+
+CHUNK_SIZE = 100_000
+OUTCOMES = {GameState.X_WINS: 1.0, GameState.O_WINS: 0.0, GameState.TIE: 0.5}
+
+# Tabela de conversão de caracteres da notação: X=1, O=-1, vazio=0 e empate
+# do tabuleiro principal=2 (não conta nem para X nem para O)
+_CHAR_CODES = np.zeros(256, dtype=np.int8)
+_CHAR_CODES[ord('X')] = 1
+_CHAR_CODES[ord('O')] = -1
+_CHAR_CODES[ord(notation.TIE_CHAR)] = 2
+_LINE_INDEX = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],  # Linhas
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],  # Colunas
+    [0, 4, 8], [2, 4, 6],             # Diagonais
+])
+# Matriz tabuleiro -> grupo (center, corner, edge)
+_GROUP_MATRIX = np.array([[BOARD_GROUPS[i] == group for group in FEATURE_GROUPS[1:]]
+                          for i in range(9)], dtype=np.int16)
+
+
+# --- Características em lote ---
+def encode_positions(texts):
+    """Converte posições em notação para arrays (células (N, 9, 9), principal (N, 9))."""
+    # split() como em validate_position: aceita qualquer espaço entre os campos
+    fields = [text.split(None, 2) for text in texts]
+    cells = ''.join(parts[0] for parts in fields).encode('ascii')
+    main = ''.join(parts[1] for parts in fields).encode('ascii')
+    cells = _CHAR_CODES[np.frombuffer(cells, dtype=np.uint8)].reshape(-1, 9, 9)
+    main = _CHAR_CODES[np.frombuffer(main, dtype=np.uint8)].reshape(-1, 1, 9)
+    return cells, main
+
+
+def _line_features(boards):
+    """(N, B, 9) -> (N, B, 3): linhas com 3, 2 e 1 peças, X menos O, por tabuleiro."""
+    lines = boards[..., _LINE_INDEX]  # (N, B, 8, 3)
+    x_count = (lines == 1).sum(axis=-1)
+    o_count = (lines == -1).sum(axis=-1)
+    empty_count = (lines == 0).sum(axis=-1)
+    features = np.stack([
+        (x_count == 3).astype(np.int16) - (o_count == 3),
+        ((x_count == 2) & (empty_count == 1)).astype(np.int16) - ((o_count == 2) & (empty_count == 1)),
+        ((x_count == 1) & (empty_count == 2)).astype(np.int16) - ((o_count == 1) & (empty_count == 2)),
+    ], axis=-1)
+    return features.sum(axis=2)
+
+
+def extract_features_batch(texts):
+    """Características de várias posições de uma vez, (N, 12) int16.
+
+    Mesma ordem e mesmos valores de `cpu_player.extract_features`.
+    """
+    cells, main = encode_positions(texts)
+    main_features = _line_features(main)[:, 0, :]                                # (N, 3)
+    board_features = _line_features(cells)                                       # (N, 9, 3)
+    group_features = np.einsum('nbk,bg->ngk', board_features, _GROUP_MATRIX)     # (N, 3, 3)
+    return np.concatenate([main_features, group_features.reshape(len(texts), 9)],
+                          axis=1).astype(np.int16)
+
+
+def check_extractors(texts):
+    """Confere que a extração em lote bate exatamente com a individual."""
+    batch = extract_features_batch(texts)
+    for text, row in zip(texts, batch):
+        game = notation.parse_position(text)
+        single = extract_features(game.boards, game.main_board)
+        if single != row.tolist():
+            raise AssertionError(f"características divergentes para {text}: {single} != {row.tolist()}")
+
+
+# --- Leitura dos registros ---
+def iter_record_chunks(paths, chunk_size=CHUNK_SIZE):
+    """Gera (posições, resultados) em blocos, sem carregar os arquivos inteiros."""
+    for path in paths:
+        stream = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+        try:
+            lines = (line for line in stream if line.strip())
+            while True:
+                chunk = list(itertools.islice(lines, chunk_size))
+                if not chunk:
+                    break
+                texts, outcomes = [], []
+                for line in chunk:
+                    record = json.loads(line)
+                    notation.validate_position(record['position'])
+                    texts.append(record['position'])
+                    outcomes.append(float(record['outcome']))
+                yield texts, np.array(outcomes)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+# --- Ajuste ---
+def fit_logistic(features, outcomes, l2=1e-4, iterations=25, tolerance=1e-9):
+    """Regressão logística por Newton (IRLS) com intercepto e regularização L2.
+
+    Com só 12 características cada iteração é uma passada pelos dados e um
+    sistema 13x13, então milhões de posições levam segundos.
+    """
+    count = len(features)
+    design = np.empty((count, features.shape[1] + 1))
+    design[:, :-1] = features
+    design[:, -1] = 1.0  # Intercepto (vantagem de quem começa), não exportado
+    weights = np.zeros(design.shape[1])
+    penalty = np.full(design.shape[1], l2 * count)
+    penalty[-1] = 0.0
+
+    for _ in range(iterations):
+        probabilities = 1.0 / (1.0 + np.exp(-(design @ weights)))
+        gradient = design.T @ (probabilities - outcomes) + penalty * weights
+        curvature = probabilities * (1.0 - probabilities)
+        hessian = (design * curvature[:, None]).T @ design + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < tolerance:
+            break
+
+    probabilities = np.clip(1.0 / (1.0 + np.exp(-(design @ weights))), 1e-12, 1 - 1e-12)
+    log_loss = -np.mean(outcomes * np.log(probabilities) + (1 - outcomes) * np.log(1 - probabilities))
+    return weights[:-1], log_loss
+
+
+def to_engine_scale(fitted, active):
+    """Leva os pesos (em logits) para a escala da avaliação original.
+
+    O fator é o de mínimos quadrados entre os pesos ajustados e os padrão,
+    para que as pontuações continuem comparáveis às de vitória (100 +
+    profundidade). Características que nunca variaram nos dados mantêm o
+    peso padrão.
+    """
+    default = np.array(weights_to_vector(DEFAULT_EVAL_WEIGHTS))
+    scale = float(fitted[active] @ default[active] / max(fitted[active] @ fitted[active], 1e-12))
+    scaled = np.where(active, fitted * scale, default)
+    return {group: [round(float(value), 4) for value in scaled[i * 3:i * 3 + 3]]
+            for i, group in enumerate(FEATURE_GROUPS)}, scale
+
+
+def command_fit(args):
+    started = time.perf_counter()
+    feature_chunks, outcome_chunks = [], []
+    for index, (texts, outcomes) in enumerate(iter_record_chunks(args.records, args.chunk_size)):
+        if index == 0:
+            check_extractors(texts[:args.check])
+        feature_chunks.append(extract_features_batch(texts))
+        outcome_chunks.append(outcomes)
+    if not feature_chunks:
+        sys.exit("Nenhum registro encontrado.")
+    features = np.concatenate(feature_chunks)
+    outcomes = np.concatenate(outcome_chunks)
+    extracted = time.perf_counter()
+
+    active = features.any(axis=0)
+    fitted, log_loss = fit_logistic(features.astype(np.float64), outcomes, l2=args.l2)
+    weights, scale = to_engine_scale(fitted, active)
+    finished = time.perf_counter()
+
+    with open(args.output, 'w') as f:
+        json.dump({'weights': weights, 'scale': scale, 'positions': int(len(features)),
+                   'log_loss': float(log_loss)}, f, indent=2)
+    print(f"Posições: {len(features)}  Extração: {extracted - started:.1f}s  "
+          f"Ajuste: {finished - extracted:.1f}s  Log-loss: {log_loss:.4f}")
+    for group in FEATURE_GROUPS:
+        print(f"  {group:<7} {weights[group]}  (padrão {DEFAULT_EVAL_WEIGHTS[group]})")
+    print(f"Pesos gravados em {args.output}")
+
+
+# --- Autojogo ---
+def play_selfplay_game(seed, opening_moves=4):
+    """Joga uma partida CPU (fácil) vs CPU (fácil) e retorna os registros."""
+    rng = random.Random(seed)
+    game = GameCore()
+    # O sorteio entre as melhores jogadas tem semente própria: mesma semente, mesma partida
+    cpus = {player: CPUPlayer("easy", player=player, seed=seed) for player in (Player.X, Player.O)}
+    positions = []
+    while game.game_state == GameState.PLAYING:
+        positions.append(notation.format_position(game))
+        if len(positions) <= opening_moves:
+            move = rng.choice(game.get_valid_moves())  # Aberturas variadas
+        else:
+            move = cpus[game.current_player].get_best_move(game)
+        game.make_move(*move)
+    outcome = OUTCOMES[game.game_state]
+    return [{'position': position, 'outcome': outcome} for position in positions]
+
+
+def command_selfplay(args):
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    records = 0
+    seeds = range(args.seed, args.seed + args.games)
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for game_records in pool.imap(play_selfplay_game, seeds, chunksize=64):
+                for record in game_records:
+                    output.write(json.dumps(record) + "\n")
+                records += len(game_records)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{args.games} partidas, {records} registros.", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ajuste dos pesos da avaliação da CPU")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    selfplay = commands.add_parser("selfplay", help="gera registros de treino por autojogo")
+    selfplay.add_argument("--games", type=int, default=1000)
+    selfplay.add_argument("--seed", type=int, default=0)
+    selfplay.add_argument("--workers", type=int, default=None)
+    selfplay.add_argument("-o", "--output", default="-")
+    selfplay.set_defaults(handler=command_selfplay)
+
+    fit = commands.add_parser("fit", help="ajusta os pesos a partir dos registros")
+    fit.add_argument("records", nargs="+", help="arquivos JSONL de registros ('-' para stdin)")
+    fit.add_argument("-o", "--output", default=EVAL_WEIGHTS_FILE)
+    fit.add_argument("--l2", type=float, default=1e-4, help="regularização L2 (por posição)")
+    fit.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    fit.add_argument("--check", type=int, default=1000,
+                     help="posições do primeiro bloco conferidas contra o extrator individual")
+    fit.set_defaults(handler=command_fit)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
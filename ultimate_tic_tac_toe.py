@@ -1,37 +1,22 @@
 # -*- coding: utf-8 -*-
+import time
+_IMPORTS_STARTED = time.perf_counter()  # Para --profile-startup
+
 import pygame
 import sys
 import math
 import json
-import random
-from enum import Enum
-from dataclasses import dataclass
-from typing import Optional, Tuple, List
+import argparse
+from typing import Optional, Tuple
 import os
+import random
 
-# --- Enums e Classes de Dados ---
-class Player(Enum):
-    X = 'X'
-    O = 'O'
-    EMPTY = ' '
-    TIE = '-'
-
-class GameState(Enum):
-    PLAYING = "playing"
-    X_WINS = "x_wins"
-    O_WINS = "o_wins"
-    TIE = "tie"
-
-class GameMode(Enum):
-    HUMAN_VS_HUMAN = "human_vs_human"
-    HUMAN_VS_CPU = "human_vs_cpu"
-
-@dataclass
-class GameStats:
-    x_wins: int = 0
-    o_wins: int = 0
-    ties: int = 0
-    total_games: int = 0
+from game_core import Player, GameState, GameMode, GameStats, GameCore
+from cpu_player import Analyzer, CPUPlayer, Ponderer
+from notation import NotationError, format_position, parse_position
+from game_history import GameHistory, Position
+from search_cache import open_search_cache
+from replay import GAMES_LOG_FILE, SNAPSHOT_INTERVAL, append_game, game_record, load_replay
 
 # --- Constantes Melhoradas ---
 # Cores com paleta moderna
@@ -84,394 +69,180 @@ BUTTON_MARGIN = 15
 CREDITS_HEIGHT = 120
 CREDITS_Y = SCREEN_HEIGHT - CREDITS_HEIGHT
 
+# Fontes, carregadas no primeiro uso (nome -> tamanho antes da escala)
+FONT_PATH = "fonts/NotoSans-Regular.ttf"
+FONT_SCALE = 1.2  # Aumentado de 1.0 para 1.2 para fontes maiores
+FONT_SIZES = {'large': 60, 'medium': 36, 'small': 24, 'tiny': 20, 'credits': 18}
+
 # Arquivo para salvar estatísticas
 STATS_FILE = "ultimate_tictactoe_stats.json"
 
-class CPUPlayer:
-    """Classe para lógica da CPU com diferentes níveis de dificuldade."""
-    def __init__(self, difficulty="medium"):
-        self.difficulty = difficulty
-        self.player = Player.O  # CPU sempre joga como O
-        self.max_depth = 2 if difficulty == "hard" else 2
-
-    def get_best_move(self, game):
-        """Retorna a melhor jogada para a CPU."""
-        if self.difficulty == "easy":
-            return self._get_random_move(game)
-        elif self.difficulty == "medium":
-            return self._get_strategic_move(game)
-        else:  # hard
-            return self._get_minimax_move(game)
-
-    def _get_random_move(self, game):
-        """Jogada aleatória (fácil)."""
-        valid_moves = self._get_valid_moves(game)
-        if valid_moves:
-            return random.choice(valid_moves)
-        return None
-
-    def _get_strategic_move(self, game):
-        """Jogada estratégica (médio) - prioriza vitórias e bloqueios."""
-        valid_moves = self._get_valid_moves(game)
-        if not valid_moves:
-            return None
-
-        # 1. Tenta vencer o jogo principal
-        for move in valid_moves:
-            main_row, main_col, row, col = move
-            if self._can_win_main_board(game, main_row, main_col, row, col):
-                return move
-
-        # 2. Bloqueia vitória do oponente no jogo principal
-        for move in valid_moves:
-            main_row, main_col, row, col = move
-            if self._can_block_main_board(game, main_row, main_col, row, col):
-                return move
-
-        # 3. Tenta vencer um tabuleiro pequeno
-        for move in valid_moves:
-            main_row, main_col, row, col = move
-            if self._can_win_small_board(game, main_row, main_col, row, col):
-                return move
-
-        # 4. Bloqueia vitória do oponente em tabuleiro pequeno
-        for move in valid_moves:
-            main_row, main_col, row, col = move
-            if self._can_block_small_board(game, main_row, main_col, row, col):
-                return move
-
-        # 5. Joga no centro se disponível
-        center_moves = [move for move in valid_moves
-                        if move[2] == 1 and move[3] == 1]  # Centro da subcélula
-        if center_moves:
-            return random.choice(center_moves)
-
-        # 6. Jogada aleatória
-        return random.choice(valid_moves)
-
-    def _get_minimax_move(self, game):
-        """Jogada usando minimax (difícil) - implementação completa."""
-        valid_moves = self._get_valid_moves(game)
-        if not valid_moves:
-            return None
-
-        best_move = None
-        best_score = float("-inf")
-
-        # Cria uma cópia do estado do jogo para o minimax
-        initial_game_state_copy = self._copy_game_state(game)
-
-        for move in valid_moves:
-            # Simula a jogada na cópia
-            game_copy_for_move = self._copy_game_state_from_dict(initial_game_state_copy)
-            main_row, main_col, row, col = move
-            self._make_move_on_copy(game_copy_for_move, main_row, main_col, row, col, self.player)
-
-            # Avalia usando minimax
-            score = self._minimax(game_copy_for_move, self.max_depth - 1, False, float("-inf"), float("inf"))
-
-            if score > best_score:
-                best_score = score
-                best_move = move
-
-        return best_move
-
-    def _minimax(self, game_state_dict, depth, is_maximizing, alpha, beta):
-        """Algoritmo minimax com poda alfa-beta."""
-        # Verifica condições de parada
-        winner = self._check_game_winner(game_state_dict)
-        if winner == self.player:
-            return 100 + depth  # Prefere vitórias mais rápidas
-        elif winner == (Player.X if self.player == Player.O else Player.O):
-            return -100 - depth  # Evita derrotas mais rápidas
-        elif winner == Player.TIE or depth == 0:
-            return self._evaluate_position(game_state_dict)
-
-        valid_moves = self._get_valid_moves_from_state(game_state_dict)
-        if not valid_moves:
-            return self._evaluate_position(game_state_dict)
-
-        if is_maximizing:
-            max_eval = float("-inf")
-            for move in valid_moves:
-                game_copy = self._copy_game_state_from_dict(game_state_dict)
-                main_row, main_col, row, col = move
-                self._make_move_on_copy(game_copy, main_row, main_col, row, col, self.player)
-
-                eval_score = self._minimax(game_copy, depth - 1, False, alpha, beta)
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-
-                if beta <= alpha:
-                    break  # Poda alfa-beta
-            return max_eval
-        else:
-            min_eval = float("inf")
-            opponent = Player.X if self.player == Player.O else Player.O
-            for move in valid_moves:
-                game_copy = self._copy_game_state_from_dict(game_state_dict)
-                main_row, main_col, row, col = move
-                self._make_move_on_copy(game_copy, main_row, main_col, row, col, opponent)
-
-                eval_score = self._minimax(game_copy, depth - 1, True, alpha, beta)
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-
-                if beta <= alpha:
-                    break  # Poda alfa-beta
-            return min_eval
-
-    def _evaluate_position(self, game_state_dict):
-        """Avalia a posição atual do jogo."""
-        score = 0
-
-        # Avalia tabuleiro principal
-        score += self._evaluate_board(game_state_dict["main_board"]) * 10
-
-        # Avalia tabuleiros pequenos
-        for i, board in enumerate(game_state_dict["boards"]):
-            board_score = self._evaluate_board(board)
-            score += board_score
-
-            # Bônus por controlar tabuleiros centrais e cantos
-            main_row, main_col = i // 3, i % 3
-            if main_row == 1 and main_col == 1:  # Centro
-                score += board_score * 0.5
-            elif (main_row, main_col) in [(0, 0), (0, 2), (2, 0), (2, 2)]:  # Cantos
-                score += board_score * 0.3
-
-        return score
-
-    def _evaluate_board(self, board):
-        """Avalia um tabuleiro 3x3."""
-        score = 0
-
-        # Verifica linhas, colunas e diagonais
-        lines = []
-        # Linhas
-        for row in board:
-            lines.append(row)
-        # Colunas
-        for col in range(3):
-            lines.append([board[row][col] for row in range(3)])
-        # Diagonais
-        lines.append([board[i][i] for i in range(3)])
-        lines.append([board[i][2 - i] for i in range(3)])
-
-        for line in lines:
-            score += self._evaluate_line(line)
-
-        return score
-
-    def _evaluate_line(self, line):
-        """Avalia uma linha de 3 células."""
-        my_count = line.count(self.player)
-        opp_count = line.count(Player.X if self.player == Player.O else Player.O)
-        empty_count = line.count(Player.EMPTY)
-
-        if my_count == 3:
-            return 50
-        elif my_count == 2 and empty_count == 1:
-            return 10
-        elif my_count == 1 and empty_count == 2:
-            return 1
-        elif opp_count == 3:
-            return -50
-        elif opp_count == 2 and empty_count == 1:
-            return -10
-        elif opp_count == 1 and empty_count == 2:
-            return -1
-
-        return 0
-
-    def _copy_game_state(self, game):
-        """Cria uma cópia do estado do jogo a partir do objeto UltimateTicTacToe."""
-        return {
-            'boards': [[[cell for cell in row] for row in board] for board in game.boards],
-            'main_board': [[cell for cell in row] for row in game.main_board],
-            'current_player': game.current_player,
-            'game_state': game.game_state
-        }
-
-    def _copy_game_state_from_dict(self, game_state_dict):
-        """Cria uma cópia do estado do jogo a partir de um dicionário de estado."""
-        return {
-            'boards': [[[cell for cell in row] for row in board] for board in game_state_dict['boards']],
-            'main_board': [[cell for cell in row] for row in game_state_dict['main_board']],
-            'current_player': game_state_dict['current_player'],
-            'game_state': game_state_dict['game_state']
-        }
+# Pondering: segundos de CPU que a CPU difícil pode usar pensando durante a
+# vez do humano (0 desativa)
+PONDER_CPU_BUDGET = 15.0
+
+# Cache em disco das buscas da CPU difícil, compartilhado entre execuções e
+# entre os processos do jogo (None desativa)
+SEARCH_CACHE_FILE = "ultimate_tictactoe_cache.bin"
+SEARCH_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Replay: jogadas puladas por PageUp/PageDown
+REPLAY_PAGE = 10
+
+# Mapa de análise (tecla A): profundidade máxima da busca em segundo plano
+ANALYSIS_MAX_DEPTH = 4
+
+class StartupProfile:
+    """Tempo de cada fase da inicialização até o primeiro quadro (--profile-startup)."""
+    def __init__(self, started=_IMPORTS_STARTED):
+        self.started = started
+        self.last = started
+        self.phases = {}
+
+    def mark(self, phase):
+        """Atribui a `phase` o tempo desde a marca anterior (fases podem se repetir)."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def report(self):
+        print(f"Inicialização até o primeiro quadro: {(self.last - self.started) * 1000:.1f} ms")
+        for phase, seconds in self.phases.items():
+            print(f"  {phase:<28} {seconds * 1000:8.1f} ms")
+
+
+class UltimateTicTacToe(GameCore):
+    def __init__(self, fullscreen: bool = True, startup_profile: Optional[StartupProfile] = None):
+        self.startup_profile = startup_profile
+        self.profile_lazy_loads = startup_profile is not None
+        self.mark_startup("importações")
+
+        # Só vídeo e fontes: pygame.init() também abriria o áudio, que o jogo não usa
+        pygame.display.init()
+        pygame.font.init()
+        # Clock também inicia o timer do SDL; sem pygame.init() get_ticks() ficaria em 0
+        self.clock = pygame.time.Clock()
+        self.mark_startup("pygame (vídeo e fontes)")
 
-    def _make_move_on_copy(self, game_state_dict, main_row, main_col, row, col, player):
-        """Faz uma jogada na cópia do estado do jogo."""
-        board_index = main_row * 3 + main_col
-        game_state_dict['boards'][board_index][row][col] = player
-
-        # Verifica vitória no tabuleiro pequeno
-        winner = self._check_winner_board(game_state_dict['boards'][board_index])
-        if winner:
-            game_state_dict['main_board'][main_row][main_col] = winner
-        elif self._is_board_full_state(game_state_dict['boards'][board_index]):
-            game_state_dict['main_board'][main_row][main_col] = Player.TIE
-
-        # Atualiza jogador atual
-        game_state_dict['current_player'] = Player.O if player == Player.X else Player.X
-
-    def _check_winner_board(self, board):
-        """Verifica vencedor em um tabuleiro."""
-        # Linhas
-        for row in board:
-            if row[0] == row[1] == row[2] and row[0] != Player.EMPTY:
-                return row[0]
-        # Colunas
-        for col in range(3):
-            if board[0][col] == board[1][col] == board[2][col] and board[0][col] != Player.EMPTY:
-                return board[0][col]
-        # Diagonais
-        if board[0][0] == board[1][1] == board[2][2] and board[0][0] != Player.EMPTY:
-            return board[0][0]
-        if board[0][2] == board[1][1] == board[2][0] and board[0][2] != Player.EMPTY:
-            return board[0][2]
-        return None
-
-    def _check_game_winner(self, game_state_dict):
-        """Verifica vencedor do jogo principal."""
-        return self._check_winner_board(game_state_dict['main_board'])
-
-    def _is_board_full_state(self, board):
-        """Verifica se um tabuleiro está cheio."""
-        return all(cell != Player.EMPTY for row in board for cell in row)
-
-    def _get_valid_moves_from_state(self, game_state_dict):
-        """Retorna jogadas válidas de um estado do jogo."""
-        valid_moves = []
-        for main_row in range(3):
-            for main_col in range(3):
-                if game_state_dict['main_board'][main_row][main_col] == Player.EMPTY:
-                    board_index = main_row * 3 + main_col
-                    for row in range(3):
-                        for col in range(3):
-                            if game_state_dict['boards'][board_index][row][col] == Player.EMPTY:
-                                valid_moves.append((main_row, main_col, row, col))
-        return valid_moves
-
-    def _get_valid_moves(self, game):
-        """Retorna todas as jogadas válidas."""
-        valid_moves = []
-        for main_row in range(3):
-            for main_col in range(3):
-                if game.main_board[main_row][main_col] == Player.EMPTY:
-                    board_index = game.get_board_index(main_row, main_col)
-                    for row in range(3):
-                        for col in range(3):
-                            if game.boards[board_index][row][col] == Player.EMPTY:
-                                valid_moves.append((main_row, main_col, row, col))
-        return valid_moves
-
-    def _can_win_small_board(self, game, main_row, main_col, row, col):
-        """Verifica se a jogada pode vencer um tabuleiro pequeno."""
-        board_index = game.get_board_index(main_row, main_col)
-        board_copy = [row[:] for row in game.boards[board_index]]
-        board_copy[row][col] = self.player
-        return game.check_winner(board_copy) == self.player
-
-    def _can_block_small_board(self, game, main_row, main_col, row, col):
-        """Verifica se a jogada pode bloquear vitória do oponente em tabuleiro pequeno."""
-        board_index = game.get_board_index(main_row, main_col)
-        board_copy = [row[:] for row in game.boards[board_index]]
-        opponent = Player.X if self.player == Player.O else Player.O
-        board_copy[row][col] = opponent
-        return game.check_winner(board_copy) == opponent
-
-    def _can_win_main_board(self, game, main_row, main_col, row, col):
-        """Verifica se a jogada pode vencer o jogo principal."""
-        # Simula a jogada
-        board_index = game.get_board_index(main_row, main_col)
-        board_copy = [row[:] for row in game.boards[board_index]]
-        board_copy[row][col] = self.player
-
-        # Verifica se vence o tabuleiro pequeno
-        if game.check_winner(board_copy) == self.player:
-            # Simula vitória no tabuleiro principal
-            main_board_copy = [row[:] for row in game.main_board]
-            main_board_copy[main_row][main_col] = self.player
-            return game.check_winner(main_board_copy) == self.player
-
-        return False
-
-    def _can_block_main_board(self, game, main_row, main_col, row, col):
-        """Verifica se a jogada pode bloquear vitória do oponente no jogo principal."""
-        board_index = game.get_board_index(main_row, main_col)
-        board_copy = [row[:] for row in game.boards[board_index]]
-        opponent = Player.X if self.player == Player.O else Player.O
-        board_copy[row][col] = opponent
-
-        # Verifica se oponente venceria o tabuleiro pequeno
-        if game.check_winner(board_copy) == opponent:
-            # Simula vitória do oponente no tabuleiro principal
-            main_board_copy = [row[:] for row in game.main_board]
-            main_board_copy[main_row][main_col] = opponent
-            return game.check_winner(main_board_copy) == opponent
-
-        return False
-
-class UltimateTicTacToe:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN | pygame.SCALED)
+        # Sem tela cheia (ex.: benchmarks com SDL_VIDEODRIVER=dummy) a janela tem o tamanho lógico
+        flags = pygame.FULLSCREEN | pygame.SCALED if fullscreen else 0
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), flags)
         pygame.display.set_caption('Ultimate Tic-Tac-Toe - by Gabriel Lucas Rodrigues Souza')
+        # A janela aparece já com o fundo enquanto o resto é preparado
+        self.screen.fill(Colors.BACKGROUND)
+        pygame.display.flip()
+        self.mark_startup("janela")
 
-        # Estado do jogo
-        self.boards = self.create_boards()
-        self.main_board = [[Player.EMPTY for _ in range(3)] for _ in range(3)]
-        self.current_player = Player.X
-        self.game_state = GameState.PLAYING
-        self.last_move = None
-        self.hover_cell = None
+        # Área de transferência (Ctrl+C/Ctrl+V); scrap exige a janela criada
+        try:
+            pygame.scrap.init()
+            self.clipboard = pygame.scrap.get_init()
+        except (pygame.error, AttributeError):
+            self.clipboard = False
 
-        # Contador de vitórias para desempate
-        self.small_wins_x = 0
-        self.small_wins_o = 0
+        # Estado do jogo (regras em GameCore)
+        super().__init__()
+        self.hover_cell = None
+        self.history = GameHistory()  # Desfazer/refazer
+        # Partida atual já gravada e contada nas estatísticas; só uma nova
+        # partida limpa (desfazer e jogar até o fim de novo não conta outra vez)
+        self.game_recorded = False
+        self.replay = None  # GameReplay em exibição (modo replay)
+        self.replay_ply = 0
 
         # Modo de jogo e CPU
         self.game_mode = GameMode.HUMAN_VS_HUMAN
+        # Cache de buscas: aberto no primeiro uso da CPU (ver search_cache)
+        self._search_cache = None
+        self._search_cache_opened = False
         self.cpu_player = CPUPlayer("medium")
         self.cpu_thinking = False
         self.cpu_think_timer = 0
         self.cpu_move_delay = 1000
+        self.ponderer = None  # Criado na primeira vez que for necessário
+        self.ponder_budget = PONDER_CPU_BUDGET
 
-        # UI - fontes adaptáveis ao tamanho da tela
-        font_scale = 1.2  # Aumentado de 1.0 para 1.2 para fontes maiores
-        try:
-            # Tenta carregar a fonte Noto Sans (suporta emojis)
-            font_path = "fonts/NotoSans-Regular.ttf"
-            if not os.path.exists(font_path):
-                raise FileNotFoundError(f"Fonte {font_path} não encontrada")
-            self.font_large = pygame.font.Font(font_path, int(60 * font_scale))
-            self.font_medium = pygame.font.Font(font_path, int(36 * font_scale))
-            self.font_small = pygame.font.Font(font_path, int(24 * font_scale))
-            self.font_tiny = pygame.font.Font(font_path, int(20 * font_scale))
-            self.font_credits = pygame.font.Font(font_path, int(18 * font_scale))
-        except (pygame.error, FileNotFoundError) as e:
-            # Fallback para fonte padrão com tamanhos escalados
-            print(f"Aviso: Não foi possível carregar a fonte Noto Sans. Usando fonte padrão. Erro: {e}")
-            self.font_large = pygame.font.Font(None, int(60 * font_scale))
-            self.font_medium = pygame.font.Font(None, int(36 * font_scale))
-            self.font_small = pygame.font.Font(None, int(24 * font_scale))
-            self.font_tiny = pygame.font.Font(None, int(20 * font_scale))
-            self.font_credits = pygame.font.Font(None, int(18 * font_scale))
+        # Mapa de análise: pontuação de cada jogada, refinada em segundo plano
+        self.show_analysis = False
+        self.analyzer = None  # Criado na primeira vez que o mapa for ligado
+        self.analysis_position = None  # Posição (notação) em análise
+        self.analysis_overlay = None
 
-        self.clock = pygame.time.Clock()
+        # UI - fontes adaptáveis ao tamanho da tela, carregadas no primeiro uso
+        self.fonts = {}
+        self.font_path = FONT_PATH  # None depois de uma falha: usa a fonte padrão
 
-        # Estatísticas
-        self.stats = self.load_stats()
+        # Estatísticas: lidas do arquivo no primeiro uso (ver `stats`)
+        self._stats = None
 
         # Botões nas laterais
         self.buttons = self.create_buttons()
-
-    def create_boards(self):
-        """Cria a estrutura de dados para os 9 tabuleiros."""
-        return [[[Player.EMPTY for _ in range(3)] for _ in range(3)] for _ in range(9)]
+        self.mark_startup("estado do jogo e CPU")
+
+    def mark_startup(self, phase):
+        """Marca o fim de uma fase da inicialização, se ela estiver sendo medida."""
+        if self.startup_profile:
+            self.startup_profile.mark(phase)
+
+    def get_font(self, name):
+        """Fonte de FONT_SIZES, carregada na primeira vez que for usada."""
+        font = self.fonts.get(name)
+        if font is None:
+            self.mark_startup("primeiro quadro")
+            size = int(FONT_SIZES[name] * FONT_SCALE)
+            if self.font_path:
+                try:
+                    # Tenta carregar a fonte Noto Sans (suporta emojis)
+                    if not os.path.exists(self.font_path):
+                        raise FileNotFoundError(f"Fonte {self.font_path} não encontrada")
+                    font = pygame.font.Font(self.font_path, size)
+                except (pygame.error, FileNotFoundError) as e:
+                    # Fallback para fonte padrão com tamanhos escalados
+                    print(f"Aviso: Não foi possível carregar a fonte Noto Sans. Usando fonte padrão. Erro: {e}")
+                    self.font_path = None
+            if font is None:
+                font = pygame.font.Font(None, size)
+            self.fonts[name] = font
+            self.mark_startup("fontes")
+        return font
+
+    font_large = property(lambda self: self.get_font('large'))
+    font_medium = property(lambda self: self.get_font('medium'))
+    font_small = property(lambda self: self.get_font('small'))
+    font_tiny = property(lambda self: self.get_font('tiny'))
+    font_credits = property(lambda self: self.get_font('credits'))
+
+    @property
+    def stats(self):
+        """Estatísticas, lidas de STATS_FILE no primeiro acesso."""
+        if self._stats is None:
+            self.mark_startup("primeiro quadro")
+            self._stats = self.load_stats()
+            self.mark_startup("estatísticas")
+        return self._stats
+
+    @stats.setter
+    def stats(self, value):
+        self._stats = value
+
+    @property
+    def search_cache(self):
+        """Cache de buscas em disco, aberto no primeiro uso da CPU.
+
+        Abrir mapeia o arquivo e indexa todas as chaves; quem só joga
+        humano vs humano não paga por isso ao abrir o jogo.
+        """
+        if not self._search_cache_opened:
+            self._search_cache_opened = True
+            started = time.perf_counter()
+            self.mark_startup("primeiro quadro")
+            if SEARCH_CACHE_FILE:
+                self._search_cache = open_search_cache(SEARCH_CACHE_FILE, SEARCH_CACHE_MAX_BYTES)
+            self.mark_startup("cache de buscas")
+            if self.profile_lazy_loads and self.startup_profile is None:
+                # Depois do primeiro quadro o relatório já saiu: informa à parte
+                print(f"Cache de buscas aberto no primeiro uso: {(time.perf_counter() - started) * 1000:.1f} ms")
+        return self._search_cache
 
     def create_buttons(self):
         """Cria os botões da interface nas laterais."""
@@ -507,126 +278,55 @@ class UltimateTicTacToe:
         with open(STATS_FILE, 'w') as f:
             json.dump(self.stats.__dict__, f)
 
-    def get_board_index(self, main_row: int, main_col: int) -> int:
-        """Converte coordenadas para índice do tabuleiro."""
-        return main_row * 3 + main_col
-
-    def check_winner(self, board: List[List[Player]]) -> Optional[Player]:
-        """Verifica vencedor em um tabuleiro 3x3."""
-        # Linhas
-        for row in board:
-            if row[0] == row[1] == row[2] and row[0] != Player.EMPTY:
-                return row[0]
-
-        # Colunas
-        for col in range(3):
-            if board[0][col] == board[1][col] == board[2][col] and board[0][col] != Player.EMPTY:
-                return board[0][col]
-
-        # Diagonais
-        if board[0][0] == board[1][1] == board[2][2] and board[0][0] != Player.EMPTY:
-            return board[0][0]
-        if board[0][2] == board[1][1] == board[2][0] and board[0][2] != Player.EMPTY:
-            return board[0][2]
-
-        return None
-
-    def is_board_full(self, board: List[List[Player]]) -> bool:
-        """Verifica se um tabuleiro está cheio."""
-        return all(cell != Player.EMPTY for row in board for cell in row)
-
-    def count_small_wins(self):
-        """Conta vitórias nos tabuleiros pequenos."""
-        x_wins = 0
-        o_wins = 0
-
-        for main_row in range(3):
-            for main_col in range(3):
-                winner = self.main_board[main_row][main_col]
-                if winner == Player.X:
-                    x_wins += 1
-                elif winner == Player.O:
-                    o_wins += 1
-
-        return x_wins, o_wins
-
     def make_move(self, main_row: int, main_col: int, row: int, col: int) -> bool:
         """Executa uma jogada se for válida."""
-        board_index = self.get_board_index(main_row, main_col)
-
-        # Validações básicas
-        if self.game_state != GameState.PLAYING:
-            return False
-
-        if self.main_board[main_row][main_col] != Player.EMPTY:
-            return False
-
-        if self.boards[board_index][row][col] != Player.EMPTY:
+        if not super().make_move(main_row, main_col, row, col):
             return False
+        self.history.play(self.last_move)
+        if self.game_state != GameState.PLAYING and not self.game_recorded:
+            self.record_game()
+            self.game_recorded = True
+
+        # Se for modo CPU e agora é a vez da CPU
+        if (self.game_mode == GameMode.HUMAN_VS_CPU and
+                self.current_player == Player.O and
+                self.game_state == GameState.PLAYING):
+            self.cpu_thinking = True
+            self.cpu_think_timer = pygame.time.get_ticks()
+
+        self.update_pondering()
+        return True
 
-        # Executa a jogada
-        self.boards[board_index][row][col] = self.current_player
-        self.last_move = (main_row, main_col, row, col)
-
-        # Verifica vitória no tabuleiro menor
-        winner = self.check_winner(self.boards[board_index])
-        if winner:
-            self.main_board[main_row][main_col] = winner
-            # Atualiza contador de vitórias pequenas
-            if winner == Player.X:
-                self.small_wins_x += 1
-            elif winner == Player.O:
-                self.small_wins_o += 1
-        elif self.is_board_full(self.boards[board_index]):
-            self.main_board[main_row][main_col] = Player.TIE
-
-        # Verifica vitória geral
-        game_winner = self.check_winner(self.main_board)
-        if game_winner:
-            if game_winner == Player.X:
-                self.game_state = GameState.X_WINS
-                self.stats.x_wins += 1
-            else:
-                self.game_state = GameState.O_WINS
-                self.stats.o_wins += 1
-            self.stats.total_games += 1
-            self.save_stats()
-        elif self.is_board_full(self.main_board):
-            # Verifica empate no jogo maior
-            # Determina vencedor por mais vitórias nos jogos menores
-            if self.small_wins_x > self.small_wins_o:
-                self.game_state = GameState.X_WINS
-                self.stats.x_wins += 1
-            elif self.small_wins_o > self.small_wins_x:
-                self.game_state = GameState.O_WINS
-                self.stats.o_wins += 1
-            else:
-                # Empate real (mesmo número de vitórias pequenas)
-                self.game_state = GameState.TIE
-                self.stats.ties += 1
-
-            self.stats.total_games += 1
-            self.save_stats()
-
-        # Troca jogador
-        if self.game_state == GameState.PLAYING:
-            self.current_player = Player.O if self.current_player == Player.X else Player.X
-
-            # Se for modo CPU e agora é a vez da CPU
-            if (self.game_mode == GameMode.HUMAN_VS_CPU and
-                    self.current_player == Player.O and
-                    self.game_state == GameState.PLAYING):
-                self.cpu_thinking = True
-                self.cpu_think_timer = pygame.time.get_ticks()
+    def on_game_over(self):
+        """Atualiza e salva as estatísticas ao fim da partida (uma vez por partida)."""
+        if self.game_recorded:
+            return
+        if self.game_state == GameState.X_WINS:
+            self.stats.x_wins += 1
+        elif self.game_state == GameState.O_WINS:
+            self.stats.o_wins += 1
+        else:
+            self.stats.ties += 1
+        self.stats.total_games += 1
+        self.save_stats()
 
-        return True
+    def record_game(self):
+        """Grava a partida terminada no arquivo de partidas (para replay)."""
+        difficulty = self.cpu_player.difficulty if self.game_mode == GameMode.HUMAN_VS_CPU else None
+        try:
+            append_game(game_record(self.history, self.game_mode, difficulty, self.game_state))
+        except OSError as e:
+            print(f"Aviso: Não foi possível gravar a partida. Erro: {e}")
 
     def process_cpu_move(self):
         """Processa jogada da CPU."""
         if (self.cpu_thinking and
                 pygame.time.get_ticks() - self.cpu_think_timer > self.cpu_move_delay):
 
-            move = self.cpu_player.get_best_move(self)
+            # Reaproveita a resposta calculada durante a vez do humano
+            move = self.ponderer.lookup(self) if self.ponderer else None
+            if move is None:
+                move = self.cpu_player.get_best_move(self)
             if move:
                 main_row, main_col, row, col = move
                 self.make_move(main_row, main_col, row, col)
@@ -635,22 +335,41 @@ class UltimateTicTacToe:
 
     def restart_game(self):
         """Reinicia o jogo atual."""
-        self.boards = self.create_boards()
-        self.main_board = [[Player.EMPTY for _ in range(3)] for _ in range(3)]
-        self.current_player = Player.X
-        self.game_state = GameState.PLAYING
-        self.last_move = None
+        self.reset()
+        self.history = GameHistory()
+        self.game_recorded = False
+        if self.replay is not None:
+            self.replay = None
+            pygame.key.set_repeat()
         self.hover_cell = None
         self.cpu_thinking = False
-        # Reset dos contadores de vitórias pequenas
-        self.small_wins_x = 0
-        self.small_wins_o = 0
+        # Semente nova a cada partida, para que as jogadas sorteadas dos
+        # níveis fácil e médio variem de uma partida para outra
+        self.cpu_player.seed = random.randrange(2 ** 32)
+        if self.ponderer:
+            self.ponderer.clear()
+        self.update_pondering()
+
+    def update_pondering(self):
+        """Inicia o pondering na vez do humano contra a CPU difícil; senão, interrompe."""
+        should_ponder = (self.game_mode == GameMode.HUMAN_VS_CPU and
+                         self.cpu_player.difficulty == "hard" and
+                         self.game_state == GameState.PLAYING and
+                         self.current_player == Player.X and
+                         self.ponder_budget > 0)
+        if should_ponder:
+            if self.ponderer is None:
+                cache_path = SEARCH_CACHE_FILE if self.search_cache else None
+                self.ponderer = Ponderer(self.ponder_budget, cache_path)
+            self.ponderer.start(self, self.cpu_player.difficulty, self.cpu_player.max_depth)
+        elif self.ponderer:
+            self.ponderer.stop()
 
     def set_game_mode(self, mode: GameMode, difficulty: str = "medium"):
         """Define o modo de jogo."""
         self.game_mode = mode
         if mode == GameMode.HUMAN_VS_CPU:
-            self.cpu_player = CPUPlayer(difficulty)
+            self.cpu_player = CPUPlayer(difficulty, search_cache=self.search_cache)
         self.restart_game()
 
     def clear_stats(self):
@@ -712,10 +431,16 @@ class UltimateTicTacToe:
                     pygame.draw.line(self.screen, Colors.GRAY,
                                      (start_x, start_y), (end_x, start_y), SUB_LINE_WIDTH)
 
+    def get_cell_rect(self, main_row: int, main_col: int, row: int, col: int) -> pygame.Rect:
+        """Retângulo de uma célula na tela."""
+        x = BOARD_X + main_col * CELL_SIZE + col * SUB_CELL_SIZE
+        y = BOARD_Y + main_row * CELL_SIZE + row * SUB_CELL_SIZE
+        return pygame.Rect(x, y, SUB_CELL_SIZE, SUB_CELL_SIZE)
+
     def draw_hover_effect(self):
         """Desenha efeito hover na célula sob o mouse."""
         if (self.hover_cell and self.game_state == GameState.PLAYING and
-                not self.cpu_thinking and
+                not self.cpu_thinking and self.replay is None and
                 (self.game_mode == GameMode.HUMAN_VS_HUMAN or self.current_player == Player.X)):
 
             (main_row, main_col), (sub_row, sub_col) = self.hover_cell
@@ -724,12 +449,61 @@ class UltimateTicTacToe:
             board_index = self.get_board_index(main_row, main_col)
             if (self.main_board[main_row][main_col] == Player.EMPTY and
                     self.boards[board_index][sub_row][sub_col] == Player.EMPTY):
-                x = BOARD_X + main_col * CELL_SIZE + sub_col * SUB_CELL_SIZE
-                y = BOARD_Y + main_row * CELL_SIZE + sub_row * SUB_CELL_SIZE
+                rect = self.get_cell_rect(main_row, main_col, sub_row, sub_col)
 
-                hover_surface = pygame.Surface((SUB_CELL_SIZE, SUB_CELL_SIZE), pygame.SRCALPHA)
+                hover_surface = pygame.Surface(rect.size, pygame.SRCALPHA)
                 hover_surface.fill(Colors.HOVER)
-                self.screen.blit(hover_surface, (x, y))
+                self.screen.blit(hover_surface, rect.topleft)
+
+    def toggle_analysis(self):
+        """Liga/desliga o mapa de análise."""
+        self.show_analysis = not self.show_analysis
+        self.analysis_position = None
+        self.analysis_overlay = None
+        if self.show_analysis and self.analyzer is None:
+            self.analyzer = Analyzer(ANALYSIS_MAX_DEPTH)
+        elif not self.show_analysis and self.analyzer:
+            self.analyzer.stop()
+
+    def update_analysis(self):
+        """Reinicia a análise quando a posição muda e recolhe resultados (sem bloquear)."""
+        if not self.show_analysis:
+            return
+        position = format_position(self)
+        if position != self.analysis_position:
+            self.analysis_position = position
+            self.analysis_overlay = None
+            self.analyzer.start(self)
+        if self.analyzer.poll():
+            self.analysis_overlay = self.build_analysis_overlay(self.analyzer.scores)
+
+    def build_analysis_overlay(self, scores):
+        """Superfície do tabuleiro com cada jogada colorida pela pontuação
+        (verde = melhor, vermelho = pior), desenhada uma vez por resultado."""
+        overlay = pygame.Surface((BOARD_SIZE, BOARD_SIZE), pygame.SRCALPHA)
+        best, worst = max(scores.values()), min(scores.values())
+        for move, score in scores.items():
+            t = (score - worst) / (best - worst) if best > worst else 1.0
+            color = (int(220 * (1 - t) + 40 * t), int(40 * (1 - t) + 180 * t), 60, 120)
+            rect = self.get_cell_rect(*move).move(-BOARD_X, -BOARD_Y)
+            overlay.fill(color, rect)
+            text = self.font_tiny.render(f"{round(score)}", True, Colors.BLACK)
+            overlay.blit(text, text.get_rect(center=rect.center))
+        return overlay
+
+    def draw_analysis(self):
+        """Desenha o mapa de análise e a profundidade já concluída."""
+        if not self.show_analysis:
+            return
+        if self.analysis_overlay is not None:
+            self.screen.blit(self.analysis_overlay, (BOARD_X, BOARD_Y))
+            label = f"Análise: profundidade {self.analyzer.depth} de {ANALYSIS_MAX_DEPTH}"
+        elif self.game_state == GameState.PLAYING:
+            label = "Análise: calculando..."
+        else:
+            label = "Análise: partida encerrada"
+        rendered = self.font_small.render(label, True, Colors.DARK_GRAY)
+        self.screen.blit(rendered, rendered.get_rect(center=(SCREEN_WIDTH // 2, BOARD_Y + BOARD_SIZE + 25)))
 
     def draw_moves(self):
         """Desenha X e O com cores diferentes."""
@@ -803,7 +577,10 @@ class UltimateTicTacToe:
         y_pos = 20
 
         # Status do jogo (com fallback para texto simples)
-        if self.game_state == GameState.PLAYING:
+        if self.replay is not None:
+            text = f"Replay: jogada {self.replay_ply} de {len(self.replay)}"
+            color = Colors.PURPLE
+        elif self.game_state == GameState.PLAYING:
             if self.cpu_thinking:
                 if self.cpu_player.difficulty == "hard":
                     text = "CPU está pensando profundamente..."  # Removido 🧠
@@ -841,8 +618,10 @@ class UltimateTicTacToe:
         self.screen.blit(rendered_text, text_rect)
 
         # Mostra contador de vitórias pequenas durante o jogo
-        if self.game_state == GameState.PLAYING:
+        if self.game_state == GameState.PLAYING or self.replay is not None:
             wins_text = f"Vitórias pequenas - X: {self.small_wins_x} | O: {self.small_wins_o}"
+            if self.replay is not None:
+                wins_text += "  (Setas, PgUp/PgDn, Home/End)"
             wins_rendered = self.font_small.render(wins_text, True, Colors.DARK_GRAY)
             wins_rect = wins_rendered.get_rect(center=(SCREEN_WIDTH // 2, y_pos + 50))
             self.screen.blit(wins_rendered, wins_rect)
@@ -992,12 +771,116 @@ class UltimateTicTacToe:
 
         # Verifica cliques no tabuleiro (apenas se for jogador humano)
         if (self.game_state == GameState.PLAYING and not self.cpu_thinking and
+                self.replay is None and
                 (self.game_mode == GameMode.HUMAN_VS_HUMAN or self.current_player == Player.X)):
             coords = self.get_mouse_position(pos)
             if coords:
                 (main_row, main_col), (sub_row, sub_col) = coords
                 self.make_move(main_row, main_col, sub_row, sub_col)
 
+    def copy_position(self):
+        """Copia a posição atual (notação compacta) para a área de transferência."""
+        text = format_position(self)
+        if self.clipboard:
+            try:
+                pygame.scrap.put(pygame.SCRAP_TEXT, text.encode())
+                return
+            except pygame.error:
+                pass
+        print(f"Posição: {text}")
+
+    def paste_position(self):
+        """Carrega uma posição em notação compacta da área de transferência."""
+        text = ""
+        if self.clipboard:
+            try:
+                data = pygame.scrap.get(pygame.SCRAP_TEXT)
+            except pygame.error:
+                data = None
+            if data:
+                text = data.decode('utf-8', errors='replace').rstrip('\x00').strip()
+        try:
+            position = parse_position(text)
+        except NotationError as e:
+            print(f"Aviso: Não foi possível colar a posição. Erro: {e}")
+            return
+
+        self.restart_game()
+        self.set_position(position)
+        self.history = GameHistory(Position.from_game(self))
+        if (self.game_mode == GameMode.HUMAN_VS_CPU and
+                self.current_player == Player.O and
+                self.game_state == GameState.PLAYING):
+            self.cpu_thinking = True
+            self.cpu_think_timer = pygame.time.get_ticks()
+        self.update_pondering()
+
+    def undo_move(self):
+        """Desfaz a última jogada (contra a CPU, volta até a vez do humano)."""
+        if self.replay is not None or not self.history.can_undo():
+            return
+        self.history.undo()
+        while (self.game_mode == GameMode.HUMAN_VS_CPU and
+               self.history.position.current_player == Player.O and
+               self.history.can_undo()):
+            self.history.undo()
+        self.load_history_position()
+
+    def redo_move(self):
+        """Refaz a jogada desfeita (contra a CPU, inclui a resposta dela)."""
+        if self.replay is not None or not self.history.can_redo():
+            return
+        self.history.redo()
+        while (self.game_mode == GameMode.HUMAN_VS_CPU and
+               self.history.position.current_player == Player.O and
+               self.history.position.game_state == GameState.PLAYING and
+               self.history.can_redo()):
+            self.history.redo()
+        self.load_history_position()
+
+    def load_history_position(self):
+        """Aplica a posição atual do histórico ao jogo."""
+        self.set_position(self.history.position.to_game())
+        self.hover_cell = None
+        self.cpu_thinking = False
+        if (self.game_mode == GameMode.HUMAN_VS_CPU and
+                self.current_player == Player.O and
+                self.game_state == GameState.PLAYING):
+            self.cpu_thinking = True
+            self.cpu_think_timer = pygame.time.get_ticks()
+        self.update_pondering()
+
+    def start_replay(self, replay):
+        """Entra no modo replay: só exibe posições, sem make_move nem estatísticas."""
+        self.restart_game()
+        if self.ponderer:
+            self.ponderer.stop()
+        self.replay = replay
+        pygame.key.set_repeat(300, 40)  # Segurar as setas percorre a partida
+        self.show_replay_ply(0)
+
+    def show_replay_ply(self, ply):
+        """Mostra a posição depois de `ply` jogadas da partida em replay."""
+        self.replay_ply = max(0, min(ply, len(self.replay)))
+        self.set_position(self.replay.seek(self.replay_ply).to_game())
+        self.hover_cell = None
+        self.cpu_thinking = False
+
+    def handle_replay_key(self, key):
+        """Teclas do replay; retorna True se a tecla foi usada."""
+        targets = {
+            pygame.K_LEFT: self.replay_ply - 1,
+            pygame.K_RIGHT: self.replay_ply + 1,
+            pygame.K_PAGEUP: self.replay_ply - REPLAY_PAGE,
+            pygame.K_PAGEDOWN: self.replay_ply + REPLAY_PAGE,
+            pygame.K_HOME: 0,
+            pygame.K_END: len(self.replay),
+        }
+        if key not in targets:
+            return False
+        self.show_replay_ply(targets[key])
+        return True
+
     def handle_mouse_motion(self, pos: Tuple[int, int]):
         """Processa movimento do mouse para efeito hover."""
         coords = self.get_mouse_position(pos)
@@ -1013,8 +896,20 @@ class UltimateTicTacToe:
                     running = False
 
                 elif event.type == pygame.KEYDOWN:
+                    if self.replay is not None and self.handle_replay_key(event.key):
+                        continue
                     if event.key == pygame.K_ESCAPE or event.key == pygame.K_F11:
                         running = False
+                    elif event.key == pygame.K_c and event.mod & pygame.KMOD_CTRL:
+                        self.copy_position()
+                    elif event.key == pygame.K_v and event.mod & pygame.KMOD_CTRL:
+                        self.paste_position()
+                    elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                        self.undo_move()
+                    elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                        self.redo_move()
+                    elif event.key == pygame.K_a:
+                        self.toggle_analysis()
                     elif event.key == pygame.K_r:
                         self.restart_game()
                     elif event.key == pygame.K_n:
@@ -1035,11 +930,15 @@ class UltimateTicTacToe:
                     self.handle_mouse_motion(event.pos)
 
             # Processa jogada da CPU se necessário
+            if self.ponderer:
+                self.ponderer.poll()
             self.process_cpu_move()
+            self.update_analysis()
 
             # Desenho
             self.draw_background()
             self.draw_hover_effect()
+            self.draw_analysis()
             self.draw_grid()
             self.draw_moves()
             self.draw_main_winners()
@@ -1048,12 +947,39 @@ class UltimateTicTacToe:
             self.draw_sidebar_info()
 
             pygame.display.flip()
+            if self.startup_profile:
+                self.mark_startup("primeiro quadro")
+                self.startup_profile.report()
+                self.startup_profile = None
             self.clock.tick(60)
 
+        if self.ponderer:
+            self.ponderer.close()
+        if self.analyzer:
+            self.analyzer.close()
+        if self._search_cache:
+            self._search_cache.close()
         pygame.quit()
         sys.exit()
 
 # --- Execução ---
 if __name__ == "__main__":
-    game = UltimateTicTacToe()
+    parser = argparse.ArgumentParser(description="Ultimate Tic-Tac-Toe")
+    parser.add_argument("--replay", metavar="ARQUIVO", nargs="?", const=GAMES_LOG_FILE,
+                        help=f"revê uma partida gravada (padrão: {GAMES_LOG_FILE})")
+    parser.add_argument("--game", type=int, default=-1,
+                        help="índice da partida no arquivo (negativo conta do fim; padrão: a última)")
+    parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL,
+                        help="jogadas entre snapshots do replay")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="mostra o tempo de cada fase até o primeiro quadro")
+    args = parser.parse_args()
+
+    game = UltimateTicTacToe(startup_profile=StartupProfile() if args.profile_startup else None)
+    if args.replay:
+        try:
+            game.start_replay(load_replay(args.replay, args.game, max(1, args.snapshot_interval)))
+        except (OSError, ValueError) as e:
+            print(f"Aviso: Não foi possível carregar o replay. Erro: {e}")
+        game.mark_startup("replay")
     game.run()
\ No newline at end of file
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""Rede de valor (MLP em NumPy puro) como avaliador de folhas da CPU.
+
+A rede recebe a posição codificada (células de X e de O, tabuleiro principal
+com X, O e empate, e a vez) e estima a probabilidade de vitória de X. Como
+LeafEvaluator, `ValueNetEvaluator` devolve 90 * (2p - 1): do ponto de vista
+de X e sempre abaixo das pontuações de vitória da busca. A busca avalia as
+folhas em lote (ver `CPUPlayer._leaf_scores`), então cada multiplicação de
+matrizes cobre todas as jogadas de um nó, inclusive as da raiz na iteração
+de profundidade 1.
+
+O lote tem um custo: dentro dele não há poda alfa-beta, todas as folhas do
+nó são avaliadas. Na profundidade 2 a busca visita ~9x mais nós que com a
+avaliação heurística (benchmarks/bench_evaluator.py: ~7000 contra ~800 por
+posição). Mesmo com cada folha em lote ~10x mais barata, a busca com a rede
+fica ~40-50% mais lenta (~100-115 ms contra ~65-80 ms por posição). Com
+orçamento de nós (níveis sem `max_depth`) o orçamento acaba antes e a rede
+alcança menos profundidade; ela compensa com profundidade fixa, como na
+análise em lote.
+
+Treino a partir dos registros de autojogo de tuning.py:
+
+    python tuning.py selfplay --games 20000 -o registros.jsonl
+    python value_net.py train registros.jsonl -o value_net.npz
+
+Uso na análise em lote:
+
+    python analyze.py posicoes.txt --value-net value_net.npz
+
+Requer NumPy (pip install numpy); o jogo em si não depende dele.
+"""
+import argparse
+import hashlib
+import sys
+import time
+
+import numpy as np
+
+from cpu_player import LeafEvaluator
+import tuning
+
+VALUE_NET_FILE = "value_net.npz"
+HIDDEN_SIZES = (64, 32)
+INPUT_SIZE = 81 * 2 + 9 * 3 + 1
+SCORE_SCALE = 90.0
+
+# Posição codificada como texto de 91 caracteres: 81 células, 9 do tabuleiro
+# principal e a vez. Tanto ' ' (Player.EMPTY) quanto '.' (notação) são vazio.
+_X, _O, _TIE = ord('X'), ord('O'), ord('-')
+
+
+def _symmetry_permutations():
+    """Índices da entrada da rede para as 8 simetrias do tabuleiro.
+
+    Cada simetria do quadrado (rotações e reflexões) é aplicada ao mesmo tempo
+    à posição dos tabuleiros pequenos e às células dentro de cada um, então a
+    posição transformada é equivalente pelas regras do jogo.
+    """
+    permutations = []
+    for k in range(8):
+        square = []
+        for index in range(9):
+            row, col = divmod(index, 3)
+            for _ in range(k % 4):
+                row, col = col, 2 - row
+            if k >= 4:
+                col = 2 - col
+            square.append(row * 3 + col)
+        # Entrada nova j recebe a antiga i tal que a simetria leva i em j
+        cells = [0] * 81
+        for board in range(9):
+            for cell in range(9):
+                cells[square[board] * 9 + square[cell]] = board * 9 + cell
+        main = [0] * 9
+        for index in range(9):
+            main[square[index]] = index
+        permutations.append(np.array(cells + [81 + i for i in cells] + [162 + i for i in main] +
+                                     [171 + i for i in main] + [180 + i for i in main] + [189]))
+    return permutations
+
+
+SYMMETRIES = _symmetry_permutations()
+
+
+def encode_state(boards, main_board, side_to_move):
+    """Texto de 91 caracteres de uma posição (boards/main_board como em GameCore)."""
+    return (''.join([cell._value_ for board in boards for row in board for cell in row]) +
+            ''.join([cell._value_ for row in main_board for cell in row]) +
+            side_to_move._value_)
+
+
+def encode_notation(text):
+    """Texto de 91 caracteres a partir da notação compacta."""
+    cells, main, side = text.split(None, 3)[:3]  # Qualquer espaço entre os campos
+    return cells + main + side
+
+
+def input_matrix(encoded):
+    """Converte posições codificadas na matriz de entrada da rede, (N, INPUT_SIZE) float32."""
+    codes = np.frombuffer(''.join(encoded).encode('ascii'), dtype=np.uint8).reshape(-1, 91)
+    cells, main, side = codes[:, :81], codes[:, 81:90], codes[:, 90:]
+    return np.concatenate([cells == _X, cells == _O, main == _X, main == _O, main == _TIE,
+                           side == _X], axis=1).astype(np.float32)
+
+
+class ValueNet:
+    """MLP com ReLU nas camadas ocultas e saída logística (P(vitória de X))."""
+    def __init__(self, weights):
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+
+    @classmethod
+    def initial(cls, seed=0, hidden_sizes=HIDDEN_SIZES):
+        """Pesos iniciais de He, com semente."""
+        rng = np.random.default_rng(seed)
+        sizes = (INPUT_SIZE,) + tuple(hidden_sizes) + (1,)
+        weights = []
+        for fan_in, fan_out in zip(sizes, sizes[1:]):
+            weights.append(rng.normal(0, np.sqrt(2 / fan_in), (fan_in, fan_out)))
+            weights.append(np.zeros(fan_out))
+        return cls(weights)
+
+    @classmethod
+    def load(cls, path=VALUE_NET_FILE):
+        with np.load(path) as data:
+            return cls([data[f"w{i}"] for i in range(len(data.files))])
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, **{f"w{i}": w for i, w in enumerate(self.weights)})
+
+    def logits(self, inputs):
+        """Logit da vitória de X para cada linha de `inputs`."""
+        activation = inputs
+        last = len(self.weights) // 2 - 1
+        for layer in range(last + 1):
+            activation = activation @ self.weights[2 * layer] + self.weights[2 * layer + 1]
+            if layer < last:
+                np.maximum(activation, 0, out=activation)
+        return activation[:, 0]
+
+    def train_step(self, inputs, targets, optimizer):
+        """Um passo de Adam em um lote; retorna a log-loss do lote."""
+        activations = [inputs]
+        last = len(self.weights) // 2 - 1
+        for layer in range(last + 1):
+            z = activations[-1] @ self.weights[2 * layer] + self.weights[2 * layer + 1]
+            activations.append(np.maximum(z, 0) if layer < last else z)
+        logits = activations[-1][:, 0]
+        probabilities = 1.0 / (1.0 + np.exp(-logits))
+
+        # Entropia cruzada com alvos 0 / 0.5 / 1: d(perda)/d(logit) = p - y
+        delta = ((probabilities - targets) / len(targets))[:, None].astype(np.float32)
+        gradients = [None] * len(self.weights)
+        for layer in range(last, -1, -1):
+            gradients[2 * layer] = activations[layer].T @ delta
+            gradients[2 * layer + 1] = delta.sum(axis=0)
+            if layer > 0:
+                delta = (delta @ self.weights[2 * layer].T) * (activations[layer] > 0)
+        optimizer.step(self.weights, gradients)
+
+        clipped = np.clip(probabilities, 1e-7, 1 - 1e-7)
+        return float(-np.mean(targets * np.log(clipped) + (1 - targets) * np.log(1 - clipped)))
+
+
+class Adam:
+    def __init__(self, weights, learning_rate=1e-3, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        self.learning_rate = learning_rate
+        self.beta1, self.beta2, self.epsilon = beta1, beta2, epsilon
+        self.m = [np.zeros_like(w) for w in weights]
+        self.v = [np.zeros_like(w) for w in weights]
+        self.t = 0
+
+    def step(self, weights, gradients):
+        self.t += 1
+        correction = np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        for w, g, m, v in zip(weights, gradients, self.m, self.v):
+            m *= self.beta1
+            m += (1 - self.beta1) * g
+            v *= self.beta2
+            v += (1 - self.beta2) * g * g
+            w -= self.learning_rate * correction * m / (np.sqrt(v) + self.epsilon)
+
+
+class ValueNetEvaluator(LeafEvaluator):
+    """ValueNet como LeafEvaluator do CPUPlayer."""
+    def __init__(self, net):
+        self.net = net
+        digest = hashlib.blake2b(digest_size=8)
+        for w in net.weights:
+            digest.update(w.tobytes())
+        self._tag = "value_net:" + digest.hexdigest()
+
+    @classmethod
+    def load(cls, path=VALUE_NET_FILE):
+        return cls(ValueNet.load(path))
+
+    def encode(self, boards, main_board, side_to_move):
+        return encode_state(boards, main_board, side_to_move)
+
+    def evaluate_batch(self, encoded):
+        logits = self.net.logits(input_matrix(encoded))
+        # 90 * (2p - 1) = 90 * tanh(logit / 2)
+        return (SCORE_SCALE * np.tanh(logits / 2)).tolist()
+
+    def cache_tag(self):
+        return self._tag
+
+
+_process_evaluators = {}
+
+
+def load_evaluator(path):
+    """Carrega a rede uma vez por processo (ex.: processos da análise em lote)."""
+    if path not in _process_evaluators:
+        _process_evaluators[path] = ValueNetEvaluator.load(path)
+    return _process_evaluators[path]
+
+
+# --- Treino ---
+def load_training_data(paths, chunk_size):
+    """Lê os registros em blocos; entradas guardadas como int8 para caber na memória."""
+    input_chunks, target_chunks = [], []
+    for texts, outcomes in tuning.iter_record_chunks(paths, chunk_size):
+        input_chunks.append(input_matrix([encode_notation(text) for text in texts]).astype(np.int8))
+        target_chunks.append(outcomes.astype(np.float32))
+    if not input_chunks:
+        sys.exit("Nenhum registro encontrado.")
+    return np.concatenate(input_chunks), np.concatenate(target_chunks)
+
+
+def mean_log_loss(net, inputs, targets, batch_size=4096):
+    total = 0.0
+    for start in range(0, len(inputs), batch_size):
+        logits = net.logits(inputs[start:start + batch_size].astype(np.float32))
+        p = np.clip(1.0 / (1.0 + np.exp(-logits)), 1e-7, 1 - 1e-7)
+        y = targets[start:start + batch_size]
+        total += float(-np.sum(y * np.log(p) + (1 - y) * np.log(1 - p)))
+    return total / len(inputs)
+
+
+def command_train(args):
+    started = time.perf_counter()
+    inputs, targets = load_training_data(args.records, args.chunk_size)
+    loaded = time.perf_counter()
+
+    # Validação: as últimas posições (partidas inteiras, sem mistura com o treino)
+    validation = max(1, int(len(inputs) * args.validation))
+    train_inputs, train_targets = inputs[:-validation], targets[:-validation]
+    valid_inputs, valid_targets = inputs[-validation:], targets[-validation:]
+    baseline = float(np.mean(train_targets))
+    baseline_loss = float(-np.mean(valid_targets * np.log(baseline) +
+                                   (1 - valid_targets) * np.log(1 - baseline)))
+    print(f"Posições: {len(train_inputs)} de treino, {validation} de validação "
+          f"(lidas em {loaded - started:.1f}s); log-loss constante: {baseline_loss:.4f}")
+
+    # Cada lote passa por uma das 8 simetrias: sem isso a rede decora as
+    # partidas do treino (posições de uma partida são muito parecidas)
+    net = ValueNet.initial(args.seed)
+    optimizer = Adam(net.weights, args.learning_rate)
+    rng = np.random.default_rng(args.seed)
+    for epoch in range(1, args.epochs + 1):
+        order = rng.permutation(len(train_inputs))
+        losses = []
+        epoch_started = time.perf_counter()
+        for start in range(0, len(order), args.batch_size):
+            batch = order[start:start + args.batch_size]
+            batch_inputs = train_inputs[batch][:, SYMMETRIES[rng.integers(len(SYMMETRIES))]]
+            losses.append(net.train_step(batch_inputs.astype(np.float32), train_targets[batch], optimizer))
+        print(f"Época {epoch}: treino {np.mean(losses):.4f}  "
+              f"validação {mean_log_loss(net, valid_inputs, valid_targets):.4f}  "
+              f"({time.perf_counter() - epoch_started:.1f}s)")
+
+    net.save(args.output)
+    print(f"Rede gravada em {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rede de valor da CPU (NumPy)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="treina a rede a partir de registros de autojogo")
+    train.add_argument("records", nargs="+", help="arquivos JSONL de tuning.py selfplay ('-' para stdin)")
+    train.add_argument("-o", "--output", default=VALUE_NET_FILE)
+    train.add_argument("--epochs", type=int, default=5)
+    train.add_argument("--batch-size", type=int, default=256)
+    train.add_argument("--learning-rate", type=float, default=1e-3)
+    train.add_argument("--validation", type=float, default=0.05, help="fração final usada para validação")
+    train.add_argument("--chunk-size", type=int, default=tuning.CHUNK_SIZE)
+    train.add_argument("--seed", type=int, default=0)
+    train.set_defaults(handler=command_train)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()